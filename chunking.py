@@ -0,0 +1,155 @@
+"""
+This module splits values too long for a single worksheet cell across
+several records, and joins them back together on load.
+
+Google Sheets holds at most 50,000 characters in a cell. A longer value
+is stored as its first chunk under the item's own Data Type, followed by
+continuation records whose Data Type has the chunk number appended,
+e.g. 'description#2', 'description#3'. A continuation record left over
+from a longer earlier value is written as an empty value.
+"""
+
+import io
+import os
+import re
+
+CELL_LIMIT = 50000
+
+# Characters stored per record, kept below the cell limit
+CHUNK_SIZE = min(
+    CELL_LIMIT,
+    int(os.environ.get('README_GENERATOR_CHUNK_SIZE', 45000))
+)
+
+CONTINUATION_PATTERN = re.compile(r'(.*)#(\d+)')
+
+
+def split_value(value):
+    """
+    Returns the chunks a value is stored as, at least one
+    """
+
+    value = str(value)
+    return [
+        value[start:start + CHUNK_SIZE]
+        for start in range(0, max(len(value), 1), CHUNK_SIZE)
+    ]
+
+
+def continuation_data_type(data_type, chunk_number):
+    """
+    Returns the Data Type of a continuation record
+    """
+    return f'{data_type}#{chunk_number}'
+
+
+def split_items(items, chunk_counts):
+    """
+    Converts items into the records to write, splitting long values into
+    continuation records and emptying continuation records no longer
+    needed.
+
+        Parameters:
+            items (dict): Maps (Section Type, Data Type) to the value
+            chunk_counts (dict): Number of records each item is currently
+            stored as, updated to the numbers after the write
+
+        Returns:
+            records (dict): Maps (Section Type, Data Type) to the value of
+            each record to write
+    """
+
+    records = {}
+
+    for (section_type, data_type), value in items.items():
+        chunks = split_value(value)
+        records[(section_type, data_type)] = chunks[0]
+
+        for chunk_number, chunk in enumerate(chunks[1:], start=2):
+            records[
+                (section_type, continuation_data_type(data_type, chunk_number))
+            ] = chunk
+
+        old_count = chunk_counts.get((section_type, data_type), 1)
+        for chunk_number in range(len(chunks) + 1, old_count + 1):
+            records[
+                (section_type, continuation_data_type(data_type, chunk_number))
+            ] = ''
+
+        chunk_counts[(section_type, data_type)] = len(chunks)
+
+    return records
+
+
+def split_records(records):
+    """
+    Converts a list of records with values of any length into the list of
+    records to store, for rewriting a readme's records in one go
+    """
+
+    stored = []
+
+    for record in records:
+        items = {
+            (record['Section Type'], record['Data Type']): record['Value']
+        }
+
+        for (section_type, data_type), value in \
+                split_items(items, {}).items():
+            stored.append({
+                'Section Type': section_type,
+                'Data Type': data_type,
+                'Value': value
+            })
+
+    return stored
+
+
+def join_records(records):
+    """
+    Joins continuation records onto the records they continue.
+
+        Parameters:
+            records (list): Records as stored
+
+        Returns:
+            records (list): The records with their whole values, without
+            continuation records
+            chunk_counts (dict): Number of records each item is stored as,
+            for items stored as more than one
+    """
+
+    continuations = {}
+    joined = []
+
+    for record in records:
+        match = CONTINUATION_PATTERN.fullmatch(record.get('Data Type') or '')
+
+        if match:
+            key = (record.get('Section Type'), match.group(1))
+            continuations.setdefault(key, {})[int(match.group(2))] = \
+                record.get('Value')
+        else:
+            joined.append(record)
+
+    chunk_counts = {}
+
+    for record in joined:
+        key = (record.get('Section Type'), record.get('Data Type'))
+        chunks = continuations.get(key)
+
+        if not chunks:
+            continue
+
+        value = io.StringIO()
+        value.write(record.get('Value') or '')
+
+        chunk_number = 2
+        while chunks.get(chunk_number):
+            value.write(chunks[chunk_number])
+            chunk_number += 1
+
+        record['Value'] = value.getvalue()
+        chunk_counts[key] = chunk_number - 1
+
+    return joined, chunk_counts
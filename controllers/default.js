@@ -1,5 +1,37 @@
 const Pty = require('node-pty');
 const fs = require('fs');
+const net = require('net');
+const child_process = require('child_process');
+
+// When README_GENERATOR_SOCKET is set, one long-lived Python process hosts
+// every session ('python3 run.py serve') and each websocket connects to it
+// over that unix socket, instead of spawning its own 'python3 run.py'.
+// README_GENERATOR_SERVER_MODE=zygote instead starts a warmed-up process
+// ('python3 run.py zygote') that forks a process for each session.
+const SESSION_SOCKET = process.env.README_GENERATOR_SOCKET;
+const SERVER_MODE = process.env.README_GENERATOR_SERVER_MODE === 'zygote' ? 'zygote' : 'serve';
+
+// The browser sends a random resume token for its tab, so that a reloaded
+// tab picks up the session where it left off. Anything else is ignored.
+const RESUME_TOKEN_PATTERN = /^[A-Za-z0-9_-]{16,64}$/;
+
+function resumeToken(client) {
+    var token = client.query && client.query.resume;
+    return typeof token === 'string' && RESUME_TOKEN_PATTERN.test(token) ? token : null;
+}
+
+if (SESSION_SOCKET) {
+    const server = child_process.spawn('python3', ['run.py', SERVER_MODE, '--socket', SESSION_SOCKET], {
+        cwd: process.env.PWD,
+        env: process.env,
+        stdio: 'inherit'
+    });
+
+    server.on('exit', function (code, signal) {
+        console.log("Session server exited: " + (code === null ? signal : code));
+        process.exit(1);
+    });
+}
 
 exports.install = function () {
 
@@ -15,8 +47,39 @@ function socket() {
 
     this.on('open', function (client) {
 
+        var token = resumeToken(client);
+
+        if (SESSION_SOCKET) {
+            // Connect to the session server
+            client.tty = net.createConnection(SESSION_SOCKET);
+            client.tty.setEncoding('utf8');
+
+            client.tty.on('close', function () {
+                client.tty = null;
+                client.close();
+                console.log("Session closed");
+            });
+
+            client.tty.on('error', function (err) {
+                console.log('Session server error: ', err);
+            });
+
+            client.tty.on('data', function (data) {
+                client.send(data);
+            });
+
+            // Handshake line naming the resume token
+            client.tty.write(token ? 'resume ' + token + '\n' : 'resume\n');
+
+            client.tty.kill = function () {
+                this.destroy();
+            };
+
+            return;
+        }
+
         // Spawn terminal
-        client.tty = Pty.spawn('python3', ['run.py'], {
+        client.tty = Pty.spawn('python3', token ? ['run.py', '--resume', token] : ['run.py'], {
             name: 'xterm-color',
             cols: 80,
             rows: 24,
@@ -7,7 +7,7 @@ class will show the output to the user in a readable format, and parse
 the users response to the menu prompts.
 """
 
-import os
+import threading
 from colorama import Fore
 
 
@@ -17,19 +17,38 @@ CHOICE_MENU_PROMPT = {
     "options": {}
 }
 
+# Function returning a status message (e.g. unsaved changes) to show
+# beneath each menu prompt. Set with set_status_line. Kept per thread, as
+# in server mode each session runs on its own thread
+STATUS_LINE = threading.local()
+
+
+def set_status_line(status_function):
+    """
+    Sets the function used to build the status line shown beneath each
+    menu prompt. The function should return an empty string when there is
+    nothing to report
+
+        Parameters:
+            status_function (function): Returns the status message
+    """
+    STATUS_LINE.function = status_function
+
 
 def clear_screen():
     """
-    Uses the OS 'clear' command to clear the terminal window.
+    Clears the terminal window by printing the same escape codes the
+    linux 'clear' command outputs.
 
-    Note: This command is a linux command and will not work on Windows
-    Operating Systems. As this app is meant to be ran on a Linux Heroku
-    app, the clear command has been chosen.
+    The codes are written through print rather than by running 'clear',
+    so that they reach the session's own terminal in server mode, and a
+    process is not started every time the screen is cleared.
 
-    If you wish to run this locally on a windows machine, please use the
-    'cls' command
+    Note: These codes are understood by xterm compatible terminals. As this
+    app is meant to be ran on a Linux Heroku app through xterm.js, they
+    have been chosen. Older Windows consoles may not understand them.
     """
-    os.system('clear')
+    print('\033[H\033[2J\033[3J', end='', flush=True)
 
 
 def process_menu(menu):
@@ -107,6 +126,13 @@ def display_menu(menu):
     """
     clear_screen()
     print(Fore.YELLOW + menu.get('prompt') + Fore.WHITE)
+
+    status_function = getattr(STATUS_LINE, 'function', None)
+    if status_function:
+        status = status_function()
+        if status:
+            print(Fore.MAGENTA + f'({status})' + Fore.WHITE)
+
     for key in menu.get('options', []).keys():
         print(f'[{key}] {menu.get("options", {}).get(key).get("prompt")}')
 
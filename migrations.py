@@ -0,0 +1,138 @@
+"""
+This module converts readme records between storage schemas.
+
+Schema 1 stored each list (site aims, target audience, user stories and
+each feature's points of note) as a single newline-joined value, so
+editing one entry rewrote the whole list.
+
+Schema 2 stores one record per list entry, keyed by a stable entry id
+appended to the Data Type (e.g. 'aims/3f2a9c1b' or '1|point/3f2a9c1b'),
+so adding, editing or deleting an entry touches a single record. A
+deleted entry is written as an empty value. The schema version is kept in
+a 'Meta' record.
+"""
+
+import hashlib
+import re
+import uuid
+
+SCHEMA_VERSION = 2
+
+# Records of this Section Type describe the readme rather than a section
+META_SECTION = 'Meta'
+SCHEMA_DATA_TYPE = 'schema_version'
+
+# Data Types holding a whole newline-joined list in schema 1
+LEGACY_LIST_PATTERN = re.compile(
+    r'aims|target_audience|user_stories|\d+\|point'
+)
+
+
+def new_item_id():
+    """
+    Returns a new, stable id for a list entry
+    """
+    return uuid.uuid4().hex[:8]
+
+
+def migrated_item_id(section_type, data_type, index, entry):
+    """
+    Returns the id of an entry split out of a schema 1 list. The id is
+    derived from the entry and its place in the list, so sessions that
+    migrate the same readme at the same time write the same records rather
+    than one copy of each entry each
+    """
+
+    key = f'{section_type}\n{data_type}\n{index}\n{entry}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]
+
+
+def split_item_data_type(data_type):
+    """
+    Splits a schema 2 list entry Data Type into the list's Data Type and
+    the entry id, e.g. 'aims/3f2a9c1b' into ('aims', '3f2a9c1b'). The id is
+    None for Data Types that are not list entries
+    """
+
+    name, _, item_id = data_type.partition('/')
+    return name, item_id or None
+
+
+def schema_version(records):
+    """
+    Returns the schema version of a readme's records
+    """
+
+    for record in records:
+        if record.get('Section Type') == META_SECTION and \
+                record.get('Data Type') == SCHEMA_DATA_TYPE:
+            return int(record.get('Value') or 1)
+
+    return 1
+
+
+def migrate_records(records):
+    """
+    Converts a readme's records to the current schema.
+
+    Each schema 1 list record is split into one record per entry, and its
+    own value is emptied. Records that are already in the current schema
+    are kept as they are.
+
+        Parameters:
+            records (list): Records as returned by load_records
+
+        Returns:
+            records (list): The records in the current schema
+            changes (dict): Maps (Section Type, Data Type) to the value to
+            write for each record changed by the migration, empty if the
+            records were already in the current schema
+    """
+
+    if schema_version(records) >= SCHEMA_VERSION:
+        return records, {}
+
+    migrated = []
+    changes = {}
+
+    for record in records:
+        section_type = record.get('Section Type')
+        data_type = record.get('Data Type')
+
+        if not LEGACY_LIST_PATTERN.fullmatch(data_type or ''):
+            migrated.append(record)
+            continue
+
+        changes[(section_type, data_type)] = ''
+
+        entries = (record.get('Value') or '').split('\n')
+        for index, entry in enumerate(entries):
+            if not entry:
+                continue
+
+            item_id = migrated_item_id(section_type, data_type, index, entry)
+            item_data_type = f'{data_type}/{item_id}'
+            migrated.append({
+                'Section Type': section_type,
+                'Data Type': item_data_type,
+                'Value': entry
+            })
+            changes[(section_type, item_data_type)] = entry
+
+    migrated.append({
+        'Section Type': META_SECTION,
+        'Data Type': SCHEMA_DATA_TYPE,
+        'Value': str(SCHEMA_VERSION)
+    })
+    changes[(META_SECTION, SCHEMA_DATA_TYPE)] = str(SCHEMA_VERSION)
+
+    return migrated, changes
+
+
+def compact_records(records):
+    """
+    Returns the records without deleted list entries or emptied schema 1
+    list records, i.e. without any record whose value is empty
+    """
+
+    return [record for record in records if record.get('Value')]
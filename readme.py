@@ -2,9 +2,39 @@
 This module contais the ReadMe class definition
 """
 
+import hashlib
 from colorama import Fore
 import sections
 import menu_helpers
+import migrations
+import chunking
+
+
+def value_hash(value):
+    """
+    Returns a short digest of a stored value, used to tell whether a value
+    differs from the one last persisted without keeping a copy of it
+    """
+    return hashlib.sha1(str(value).encode('utf-8')).hexdigest()
+
+
+def render_records(title, records):
+    """
+    Returns the README of a readme built from its records, without a
+    session or store. Runs in worker processes when exporting readmes
+
+        Parameters:
+            title (str): The title of the readme
+            records (list): The readme's records, as stored
+
+        Returns:
+            output (str): The raw format of the readme file sections
+    """
+
+    readme = Readme(None, title, None)
+    readme.load_sections(records)
+
+    return readme.output_raw()
 
 
 class Readme:
@@ -17,19 +47,51 @@ class Readme:
     ----------
     title : str
         the title of the project
+    store : ReadmeStore
+        where the readme's records are persisted, None if the readme was
+        restored from a session snapshot
+    records : dict
+        Last committed value of each item, keyed by (Section Type, Data
+        Type), kept for the session snapshot
+    persisted_hashes : dict
+        Digest of the last persisted value of each item, keyed by
+        (Section Type, Data Type), so unchanged values are never rewritten
+    chunk_counts : dict
+        Number of records each item too long for one cell is stored as
 
     Methods
     -------
     add_section(section_type):
         Adds a section of a given type to the readme object
+
+    get_store():
+        Returns the readme's store, opening it if needed
+
+    begin_transaction():
+        Opens a section-edit transaction
+
+    commit_transaction():
+        Closes a section-edit transaction, writing all staged changes to the
+        store in a single batch once the outermost transaction closes
     """
 
-    def __init__(self, session, title, worksheet):
+    def __init__(self, session, title, store):
+        # session and store are None for a readme only rendered, e.g. one
+        # generated from a spec file
         self.session = session
         self.title = title
         self.sections = {}
         self.image_path = ""
-        self.worksheet = worksheet
+        self.store = store
+
+        # Section writes are held here while a section-edit transaction is
+        # open, keyed by (Section Type, Data Type), and sent to the store
+        # together when the outermost transaction commits
+        self.pending_writes = {}
+        self.transaction_depth = 0
+        self.persisted_hashes = {}
+        self.chunk_counts = {}
+        self.records = {}
 
         self.section_types = {
             'Introduction': sections.IntroSection,
@@ -45,7 +107,7 @@ class Readme:
         attached to the active session
         """
 
-        menu = menu_helpers.CHOICE_MENU_PROMPT
+        menu = dict(menu_helpers.CHOICE_MENU_PROMPT)
         menu['options'] = {
             "1": {
                 "prompt": "Add/Edit Section",
@@ -73,7 +135,20 @@ class Readme:
         """
         Detach the current readme object from the active session
         Essentially returns the user to the main menu
+
+        Any changes still being saved in the background are flushed first
         """
+        if not self.session.flush_writes():
+            menu_helpers.clear_screen()
+            print(
+                Fore.RED +
+                "Some changes could not be saved:\n" +
+                str(self.session.writer.last_error) +
+                "\nThey will be retried with your next change." +
+                Fore.WHITE
+            )
+            input(Fore.YELLOW + "Press enter to continue.." + Fore.WHITE)
+
         self.session.set_current_readme(None)
 
     def add_section(self):
@@ -115,32 +190,155 @@ class Readme:
                 menu.get('options').get(response).get('prompt')
             ] = section
 
-    def find_next_empty_sheet_row(self):
+    def get_store(self):
+        """
+        Returns the readme's store, opening it from the session's storage
+        if the readme was restored without one. Only used for loading,
+        writes never need the store to be open
+        """
+        if self.store is None:
+            self.store = self.session.storage.open_readme(self.title)
+
+        return self.store
+
+    def snapshot_records(self):
+        """
+        Returns the readme's records as they are stored, for the session
+        snapshot
+        """
+        return chunking.split_records([
+            {'Section Type': section_type, 'Data Type': data_type,
+             'Value': value}
+            for (section_type, data_type), value in self.records.items()
+        ])
+
+    def begin_transaction(self):
+        """
+        Opens a section-edit transaction. Until the matching call to
+        commit_transaction, section writes are only staged in memory.
+
+        Transactions may be nested (e.g. a Feature questionnaire running
+        inside the Features section questionnaire), only the outermost
+        commit sends anything to be saved.
         """
-        Gathers all rows from a worksheet and returns the index
-        of the next empty row for appending
+        self.transaction_depth += 1
+
+    def commit_transaction(self):
+        """
+        Closes a section-edit transaction. When the outermost transaction
+        closes, every staged write is handed to the session's write-behind
+        queue, which writes them to the store as one batch on a background
+        thread.
+
+        Values too long for a single cell are split into continuation
+        records here, so sections never need to know about the limit.
+
+        The session snapshot is saved after every commit.
         """
+        self.transaction_depth -= 1
+
+        if self.transaction_depth > 0 or not self.pending_writes:
+            return
+
+        pending_writes = self.pending_writes
+
+        # A readme restored from a session snapshot has no store yet, the
+        # writer opens it when syncing. The staged writes are only cleared
+        # once they have been journaled
+        self.session.writer.submit(
+            self.title,
+            chunking.split_items(pending_writes, self.chunk_counts),
+            self.store
+        )
+        self.pending_writes = {}
 
-        col_values = self.worksheet.col_values(1)
+        for key, value in pending_writes.items():
+            self.persisted_hashes[key] = value_hash(value)
 
-        # Add 1 for the next empty row
-        return len(col_values) + 1
+        self.records.update(pending_writes)
+        self.session.save_snapshot()
 
-    def load_sections(self):
+    def stage_write(self, section_type, data_type, value):
         """
-        Given a google worksheet object, build section objects accordingly
-        and attach them to the current readme object
+        Stages a section item write for the current transaction. If no
+        transaction is open the write is committed straight away.
+
+        Values equal to the last persisted value of the item are not
+        written again, and emptying an item that was never persisted (e.g.
+        deleting a list entry added in the same transaction) writes
+        nothing.
 
             Parameters:
-            worksheet (gspread worksheet): The worksheet object returned from
-            Google sheets
+                section_type (str): The Section Type column value
+                data_type (str): The Data Type column value
+                value (str): The value to store for the item
+        """
+        key = (section_type, data_type)
+
+        persisted_hash = self.persisted_hashes.get(key)
+
+        self.begin_transaction()
+        if persisted_hash == value_hash(value) or \
+                (persisted_hash is None and value == ''):
+            # Setting the persisted value again, or emptying an item the
+            # store has never seen, undoes any change to the item staged
+            # earlier in the transaction
+            self.pending_writes.pop(key, None)
+        else:
+            self.pending_writes[key] = value
+        self.commit_transaction()
+
+    def load_sections(self, stored_records=None):
         """
+        Reads the readme's records from its store, builds section objects
+        accordingly and attach them to the current readme object.
 
-        worksheet_data = self.worksheet.get_all_records()
+        Records in an older schema are migrated to the current one as they
+        are loaded, and the migrated records saved like any other change.
+
+            Parameters:
+                stored_records (list): Records to load instead of reading
+                the store, e.g. from a session snapshot
+        """
+
+        if stored_records is None:
+            stored_records = self.get_store().load_records()
+
+        # Changes that have not been synced to the store yet (e.g. made
+        # while offline) are applied on top of the stored records
+        records = stored_records
+        if self.session:
+            records = self.session.writer.journal.apply(self.title, records)
+
+        # Values split across continuation records are joined back up
+        records, self.chunk_counts = chunking.join_records(records)
+
+        self.persisted_hashes = {
+            (row.get('Section Type'), row.get('Data Type')):
+                value_hash(row.get('Value'))
+            for row in records
+        }
+
+        records, changes = migrations.migrate_records(records)
+
+        self.records = {
+            (row.get('Section Type'), row.get('Data Type')): row.get('Value')
+            for row in records
+        }
+
+        # Readmes without a session are only rendered, never saved
+        if changes and self.session:
+            self.begin_transaction()
+            for (section_type, data_type), value in changes.items():
+                self.stage_write(section_type, data_type, value)
+            self.commit_transaction()
 
         section_records = {}
 
-        for row in worksheet_data:
+        for row in records:
+            if row.get('Section Type') == migrations.META_SECTION:
+                continue
+
             if section_records.get(row.get('Section Type')):
                 section_records[row.get('Section Type')].append(row)
             else:
@@ -154,7 +352,6 @@ class Readme:
                 section_object.load_section(item[1])
 
                 self.sections[item[0]] = section_object
-                print(self.sections)
             else:
                 raise Exception(f"Unknown Class Found in README: {item[0]}")
 
@@ -0,0 +1,166 @@
+"""
+This module reads readme spec files, used to generate READMEs without the
+interactive menus.
+
+A spec describes a whole readme declaratively, in YAML or JSON:
+
+    title: My Project
+    introduction:
+      description: What the project does
+      demo_link: https://example.com
+      image: assets/images/intro.png
+    user_experience:
+      site_aims:
+        - An aim
+      target_audience:
+        - An audience
+      user_stories:
+        - goal: see my progress
+          action: open the dashboard
+      flowchart: assets/images/flowchart.png
+    features:
+      - name: A feature
+        points:
+          - A point of note
+        image: assets/images/feature.png
+
+Every key except the title is optional. The spec is converted into the
+same records a readme is stored as, so it is loaded and rendered exactly
+like a stored readme.
+"""
+
+import json
+import os
+
+import migrations
+
+
+def load_spec(path):
+    """
+    Reads a spec file. Files ending in .json are read as JSON, anything
+    else as YAML
+
+        Parameters:
+            path (str): Path to the spec file
+
+        Returns:
+            spec (dict): The spec
+    """
+
+    with open(path, encoding='utf-8') as file:
+        if os.path.splitext(path)[1].lower() == '.json':
+            spec = json.load(file)
+        else:
+            # pylint: disable=import-outside-toplevel
+            import yaml
+
+            spec = yaml.safe_load(file)
+
+    if not isinstance(spec, dict):
+        raise Exception(f"The spec in {path} must be a mapping of keys")
+
+    return spec
+
+
+def spec_list(spec, key, where):
+    """
+    Returns a list from the spec, raising an error naming the key if it
+    is something else
+    """
+
+    value = spec.get(key) or []
+
+    if not isinstance(value, list):
+        raise Exception(f"'{key}' in {where} must be a list")
+
+    return value
+
+
+def spec_records(spec):
+    """
+    Converts a spec into a readme's records, in the current schema.
+
+        Parameters:
+            spec (dict): The spec, as read by load_spec
+
+        Returns:
+            title (str): The title of the readme
+            records (list): The readme's records
+    """
+
+    title = spec.get('title')
+    if not title:
+        raise Exception("The spec must have a 'title'")
+
+    records = []
+
+    def add_record(section_type, data_type, value):
+        if value:
+            records.append({
+                'Section Type': section_type,
+                'Data Type': data_type,
+                'Value': str(value)
+            })
+
+    intro = spec.get('introduction') or {}
+    add_record('Introduction', 'description', intro.get('description'))
+    add_record('Introduction', 'demo_link', intro.get('demo_link'))
+    add_record('Introduction', 'intro_image_path', intro.get('image'))
+
+    user_experience = spec.get('user_experience') or {}
+    for aim in spec_list(user_experience, 'site_aims', 'user_experience'):
+        add_record(
+            'User Experience',
+            f'aims/{migrations.new_item_id()}',
+            aim
+        )
+
+    for audience in spec_list(
+            user_experience, 'target_audience', 'user_experience'):
+        add_record(
+            'User Experience',
+            f'target_audience/{migrations.new_item_id()}',
+            audience
+        )
+
+    for story in spec_list(user_experience, 'user_stories', 'user_experience'):
+        if not isinstance(story, dict):
+            raise Exception(
+                "Each user story must have a 'goal' and an 'action'"
+            )
+        add_record(
+            'User Experience',
+            f'user_stories/{migrations.new_item_id()}',
+            f"{story.get('goal', '')}|{story.get('action', '')}"
+        )
+
+    add_record(
+        'User Experience',
+        'flowchart',
+        user_experience.get('flowchart')
+    )
+
+    features = spec_list(spec, 'features', 'the spec')
+    for number, feature in enumerate(features, start=1):
+        if not isinstance(feature, dict) or not feature.get('name'):
+            raise Exception("Each feature must have a 'name'")
+
+        add_record('Features', f'{number}|feature_name', feature['name'])
+
+        points = spec_list(feature, 'points', f"feature '{feature['name']}'")
+        for point in points:
+            add_record(
+                'Features',
+                f'{number}|point/{migrations.new_item_id()}',
+                point
+            )
+
+        add_record('Features', f'{number}|image_path', feature.get('image'))
+
+    records.append({
+        'Section Type': migrations.META_SECTION,
+        'Data Type': migrations.SCHEMA_DATA_TYPE,
+        'Value': str(migrations.SCHEMA_VERSION)
+    })
+
+    return str(title), records
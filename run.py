@@ -3,27 +3,40 @@ This module is responsible for the core running of Readme Generator.
 It is the first module entered when the program is executed.
 
 The module keeps track of user sessions, and handles main menu functionality
+
+Usage:
+    python3 run.py [--resume TOKEN]         Run a single session in this
+                                            terminal, picking up where the
+                                            last session with the same
+                                            resume token left off
+    python3 run.py serve --socket PATH      Host a session for each
+                                            connection to a unix socket
+    python3 run.py zygote --socket PATH     Fork a warmed-up process for
+                                            each connection to a unix
+                                            socket
+    python3 run.py migrate                  Convert every stored readme
+                                            to the current schema
+    python3 run.py generate --spec PATH     Write a README from a spec
+                  [--out PATH]              file, without the menus
+    python3 run.py export-all --out DIR     Write the README of every
+                  [--workers N]             stored readme to DIR
 """
 
+import argparse
+import os
 import sys
+import threading
 import time
-import gspread
+from functools import partial
 from colorama import Fore
-from google.oauth2.service_account import Credentials
 
+import chunking
 import menu_helpers
-from readme import Readme
-
-SCOPE = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive.file",
-    "https://www.googleapis.com/auth/drive"
-    ]
-
-CREDS = Credentials.from_service_account_file('creds.json')
-SCOPED_CREDS = CREDS.with_scopes(SCOPE)
-GSPREAD_CLIENT = gspread.authorize(SCOPED_CREDS)
-SHEET = GSPREAD_CLIENT.open('readme_generator')
+import migrations
+import readme_spec
+import storage
+from storage.files import write_atomically
+from readme import Readme, render_records
 
 
 def start_animation():
@@ -94,16 +107,192 @@ def exit_animation():
     menu_helpers.clear_screen()
 
 
-def exit_app():
+def exit_app(session=None):
     """
     Displays an exit message to the user and exits the app
-    once complete
+    once complete. Changes the session is still saving in the
+    background are flushed before exiting
     """
 
+    if session and not session.flush_writes():
+        print(
+            Fore.RED +
+            "Some changes could not be saved:\n" +
+            str(session.writer.last_error) +
+            Fore.WHITE
+        )
+        input(Fore.YELLOW + "Press enter to exit.." + Fore.WHITE)
+
+    if session:
+        session.discard_snapshot()
+
     exit_animation()
     sys.exit()
 
 
+def open_journal(readme_storage):
+    """
+    Returns the local journal of changes not yet saved to readme_storage
+    """
+    return storage.WriteJournal(
+        os.environ.get(
+            'README_GENERATOR_JOURNAL',
+            'readme_generator_journal.jsonl'
+        ),
+        readme_storage.scope()
+    )
+
+
+def open_snapshots():
+    """
+    Returns the local snapshots of session state, used to resume sessions
+    """
+    return storage.SessionSnapshots(
+        os.environ.get(
+            'README_GENERATOR_SESSION_DIR',
+            '.readme_generator_sessions'
+        )
+    )
+
+
+def migrate_readmes(readme_storage, journal):
+    """
+    Converts every stored readme to the current schema, rewriting each
+    readme's records in one go. Changes left in the journal are included
+    in the rewrite. Records emptied by a migration or by deleting list
+    entries are dropped, so this also compacts readmes already in the
+    current schema.
+
+    Should be run while no sessions are editing readmes.
+    """
+
+    for title in readme_storage.list_readmes():
+        store = readme_storage.open_readme(title)
+
+        ids, _ = journal.pending_items(title)
+        records = journal.apply(title, store.load_records())
+
+        joined, _ = chunking.join_records(records)
+        migrated, changes = migrations.migrate_records(joined)
+        compacted = chunking.split_records(
+            migrations.compact_records(migrated)
+        )
+
+        if not changes and len(compacted) == len(records):
+            print(Fore.WHITE + f"{title}: up to date")
+            continue
+
+        store.replace_records(compacted)
+        journal.remove(ids)
+
+        print(
+            Fore.GREEN +
+            f"{title}: {len(records)} records rewritten as " +
+            f"{len(compacted)}" +
+            Fore.WHITE
+        )
+
+
+def generate_readme(spec_path, out_path):
+    """
+    Writes a README generated from a spec file, without a session or any
+    prompts, e.g. for generating READMEs in CI
+
+        Parameters:
+            spec_path (str): Path to the YAML or JSON spec file
+            out_path (str): Path to write the README to
+    """
+
+    title, records = readme_spec.spec_records(
+        readme_spec.load_spec(spec_path)
+    )
+
+    with open(out_path, "w", encoding="utf-8") as file:
+        file.write(render_records(title, records))
+
+    print(Fore.GREEN + f"File '{out_path}' created." + Fore.WHITE)
+
+
+def export_readmes(readme_storage, journal, out_dir, workers=None):
+    """
+    Writes the README of every stored readme to out_dir, as
+    '<title>_README.md', then prints the time spent on each stage.
+
+    1. Fetch: the records of every readme are read in batched requests,
+       with changes left in the journal applied on top
+    2. Render: the READMEs are rendered concurrently in a pool of
+       worker processes
+    3. Write: each file is written atomically
+
+        Parameters:
+            readme_storage (Storage): Where the readmes are stored
+            journal (WriteJournal): Changes not yet saved to storage
+            out_dir (str): Directory to write the READMEs to
+            workers (int): Number of worker processes, defaults to the
+            number of CPUs
+
+        Returns:
+            failed (list): Titles of the readmes that could not be
+            rendered
+    """
+    # pylint: disable=import-outside-toplevel
+    # multiprocessing is slow to import and only needed here
+    from concurrent.futures import ProcessPoolExecutor
+
+    timings = {}
+
+    started = time.perf_counter()
+    titles = readme_storage.list_readmes()
+    stored_records = readme_storage.load_readmes(titles)
+    records = {
+        title: journal.apply(title, stored_records[title])
+        for title in titles
+    }
+    timings['Fetch'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    outputs = {}
+    failed = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            title: pool.submit(render_records, title, records[title])
+            for title in titles
+        }
+
+        for title, future in futures.items():
+            try:
+                outputs[title] = future.result()
+            except Exception as err:  # pylint: disable=broad-except
+                failed.append(title)
+                print(Fore.RED + f"{title}: {err}" + Fore.WHITE)
+
+    timings['Render'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+
+    for title, output in outputs.items():
+        file_name = title.replace(os.sep, '_') + '_README.md'
+        write_atomically(
+            os.path.join(out_dir, file_name),
+            output,
+            mode=0o644
+        )
+
+    timings['Write'] = time.perf_counter() - started
+
+    print(
+        Fore.GREEN +
+        f"Exported {len(outputs)} of {len(titles)} readmes to {out_dir}" +
+        Fore.WHITE
+    )
+    for stage, seconds in timings.items():
+        print(f"  {stage:<8}{seconds:8.2f}s")
+
+    return failed
+
+
 class Session:
     """
     A class to a represent a user's current session in the tool.
@@ -117,6 +306,17 @@ class Session:
 
     Attributes
     ----------
+    storage : Storage
+        Where the session's readmes are stored
+    prefetch_thread : threading.Thread
+        Warms up the storage while the start animation plays
+    writer : WriteBehindQueue
+        Journals readme changes locally and syncs them to the storage on a
+        background thread
+    resume_token : str
+        Identifies the browser tab the session belongs to, or None
+    snapshots : SessionSnapshots
+        Where the session's state is saved for the resume token
 
     Methods
     -------
@@ -132,6 +332,12 @@ class Session:
     set_current_readme()
         Sets the current readme object for the session
 
+    save_snapshot()
+        Saves the session's state for its resume token
+
+    resume()
+        Restores the session's state saved for its resume token
+
     create_new_readme()
         Instantiates a new readme object and assigns it to the current session
 
@@ -140,16 +346,33 @@ class Session:
 
     """
 
-    def __init__(self):
+    def __init__(self, readme_storage, resume_token=None):
         self.current_readme = None
+        self.storage = readme_storage
+        self.prefetch_thread = None
+        self.writer = storage.WriteBehindQueue(
+            readme_storage,
+            open_journal(readme_storage)
+        )
+        self.resume_token = resume_token
+        self.snapshots = open_snapshots()
 
     def start(self):
         """
         Handles main logic of the tool once a session starts.
 
-        1. Show main menu loop
+        1. Start warming up the storage in the background
+        2. Replay any changes left unsynced by an earlier run
+        3. Restore the state of an earlier session with the same resume
+           token, or else show the start animation
+        4. Show main menu loop
         """
-        start_animation()
+        self.start_prefetch()
+        self.writer.resume()
+        menu_helpers.set_status_line(self.writer.status)
+
+        if not self.resume():
+            start_animation()
 
         while True:
             self.main_menu()
@@ -168,7 +391,7 @@ class Session:
             self.get_current_readme().display_menu()
 
         else:
-            menu = menu_helpers.CHOICE_MENU_PROMPT
+            menu = dict(menu_helpers.CHOICE_MENU_PROMPT)
             menu['options'] = {
                 "1": {
                     "prompt": "Create New README File",
@@ -180,7 +403,7 @@ class Session:
                 },
                 "3": {
                     "prompt": "Exit",
-                    "action": exit_app
+                    "action": partial(exit_app, self)
                 }
             }
 
@@ -188,6 +411,49 @@ class Session:
 
             menu.get('options').get(response).get('action')()
 
+    def start_prefetch(self):
+        """
+        Starts the storage prefetch (authenticating, opening the
+        spreadsheet, listing readmes) on a background thread, so that it
+        runs while the start animation is shown
+        """
+        self.prefetch_thread = threading.Thread(
+            target=self.prefetch_storage,
+            daemon=True
+        )
+        self.prefetch_thread.start()
+
+    def prefetch_storage(self):
+        """
+        Runs the storage prefetch. Any error is ignored here, as the same
+        work is retried, and the error shown, when the storage is used
+        """
+        try:
+            self.storage.prefetch()
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    def wait_for_prefetch(self):
+        """
+        Waits for a running storage prefetch to finish
+        """
+        if self.prefetch_thread:
+            self.prefetch_thread.join()
+            self.prefetch_thread = None
+
+    def flush_writes(self):
+        """
+        Waits for all changes queued by the session to be saved.
+
+            Returns:
+                saved (bool): True if every change has been saved
+        """
+        if self.writer.status():
+            menu_helpers.clear_screen()
+            print(Fore.YELLOW + "Saving changes..." + Fore.WHITE)
+
+        return self.writer.flush()
+
     def get_current_readme(self):
         """
         Returns the current readme object for the session
@@ -199,6 +465,59 @@ class Session:
         Sets the current readme object for the session
         """
         self.current_readme = readme_object
+        self.save_snapshot()
+
+    def save_snapshot(self):
+        """
+        Saves the session's state (the current readme and its records)
+        for its resume token, if it has one
+        """
+        if not self.resume_token:
+            return
+
+        readme = self.get_current_readme()
+        snapshot = {'readme': None, 'records': []}
+
+        if readme:
+            snapshot = {
+                'readme': readme.title,
+                'records': readme.snapshot_records()
+            }
+
+        self.snapshots.save(self.resume_token, snapshot)
+
+    def discard_snapshot(self):
+        """
+        Removes the session's saved state once the user has exited
+        """
+        if self.resume_token:
+            self.snapshots.discard(self.resume_token)
+
+    def resume(self):
+        """
+        Restores the current readme saved for the session's resume token.
+        The readme is rebuilt from the snapshot's records, plus any changes
+        still in the journal, without reading it from the storage.
+
+            Returns:
+                resumed (bool): True if a snapshot was found
+        """
+        snapshot = self.snapshots.load(self.resume_token)
+
+        if snapshot is None:
+            return False
+
+        if snapshot.get('readme'):
+            readme = Readme(self, snapshot['readme'], None)
+            try:
+                readme.load_sections(snapshot.get('records', []))
+            except Exception:  # pylint: disable=broad-except
+                # A snapshot that cannot be loaded is simply not resumed
+                return False
+            self.set_current_readme(readme)
+
+        menu_helpers.clear_screen()
+        return True
 
     def create_new_readme(self):
         """
@@ -206,11 +525,9 @@ class Session:
         """
         menu_helpers.clear_screen()
         project_name = input(Fore.YELLOW + "Project Name: " + Fore.WHITE)
+        self.wait_for_prefetch()
         try:
-            worksheet = self.create_worksheet(project_name)
-            worksheet.update('A1', 'Section Type')
-            worksheet.update('B1', 'Data Type')
-            worksheet.update('C1', 'Value')
+            store = self.storage.create_readme(project_name)
         except Exception as err:
             menu_helpers.clear_screen()
             print(
@@ -228,57 +545,43 @@ class Session:
         readme_object = Readme(
             self,
             project_name,
-            worksheet
+            store
         )
         self.set_current_readme(readme_object)
 
-    def create_worksheet(self, readme_title):
-        """
-        Creates and returns a worksheet in the spreadsheet for a readme
-        """
-
-        # Check if the worksheet already exists
-        try:
-            SHEET.worksheet(readme_title)
-            raise Exception(
-                'A worksheet with this name already exists! Please try again'
-            )
-        except gspread.exceptions.WorksheetNotFound:
-            pass
-
-        worksheet = SHEET.add_worksheet(readme_title, 0, 3)
-        return worksheet
-
     def load_readme(self, readme_name):
         """
-        Loads a specified readme file data from google sheets,
+        Loads a specified readme file data from storage,
         creates a readme object and instructs the readme object
         to create appropriate section objects
         """
 
-        worksheet = SHEET.worksheet(readme_name)
-        readme = Readme(self, readme_name, worksheet)
+        self.wait_for_prefetch()
+
+        store = self.storage.open_readme(readme_name)
+        readme = Readme(self, readme_name, store)
 
-        readme.find_next_empty_sheet_row()
         readme.load_sections()
 
         self.set_current_readme(readme)
 
     def list_readmes_to_load(self):
         """
-        Lists the current Readmes that have been saved to Google Sheets
+        Lists the current Readmes that have been saved to storage
         """
 
-        all_readme_sheets = SHEET.worksheets()
+        self.wait_for_prefetch()
+
+        all_readme_titles = self.storage.list_readmes()
         menu = {
             "prompt": "Which README would you like to load:",
             "type": "choice",
             "options": {}
         }
 
-        for count, value in enumerate(all_readme_sheets):
+        for count, value in enumerate(all_readme_titles):
             menu["options"][str(count + 1)] = {
-                "prompt": value.title,
+                "prompt": value,
                 "action": self.load_readme
             }
 
@@ -288,12 +591,162 @@ class Session:
             .get('action')(menu.get('options').get(response).get('prompt'))
 
 
+def warm_up(readme_storage):
+    """
+    Imports everything sessions use and authenticates with the storage,
+    so that sessions forked from this process start fully warmed up
+    """
+    # pylint: disable=import-outside-toplevel,unused-import
+    import tabulate  # noqa: F401
+
+    try:
+        readme_storage.prefetch()
+    except Exception as err:  # pylint: disable=broad-except
+        # Sessions retry the prefetch, and show the error, themselves
+        print(Fore.RED + f"Could not warm up the storage: {err}" + Fore.WHITE)
+
+
+def parse_args(argv):
+    """
+    Parses the command line arguments for the program
+    """
+    parser = argparse.ArgumentParser(description="Readme Generator")
+    parser.add_argument(
+        '--resume',
+        help="resume token of the browser tab running the session"
+    )
+    commands = parser.add_subparsers(dest='command')
+
+    serve_parser = commands.add_parser(
+        'serve',
+        help="host many sessions in one process over a unix socket"
+    )
+    serve_parser.add_argument(
+        '--socket',
+        default=os.environ.get(
+            'README_GENERATOR_SOCKET',
+            'readme_generator.sock'
+        ),
+        help="path of the unix socket to listen on"
+    )
+
+    zygote_parser = commands.add_parser(
+        'zygote',
+        help="fork a warmed-up process for each session over a unix socket"
+    )
+    zygote_parser.add_argument(
+        '--socket',
+        default=os.environ.get(
+            'README_GENERATOR_SOCKET',
+            'readme_generator.sock'
+        ),
+        help="path of the unix socket to listen on"
+    )
+
+    commands.add_parser(
+        'migrate',
+        help="convert every stored readme to the current schema"
+    )
+
+    generate_parser = commands.add_parser(
+        'generate',
+        help="write a README from a spec file, without the menus"
+    )
+    generate_parser.add_argument(
+        '--spec',
+        required=True,
+        help="path of the YAML or JSON spec file"
+    )
+    generate_parser.add_argument(
+        '--out',
+        default='README.md',
+        help="path to write the README to"
+    )
+
+    export_parser = commands.add_parser(
+        'export-all',
+        help="write the README of every stored readme to a directory"
+    )
+    export_parser.add_argument(
+        '--out',
+        required=True,
+        help="directory to write the READMEs to"
+    )
+    export_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help="number of worker processes rendering READMEs"
+    )
+
+    return parser.parse_args(argv)
+
+
 def main():
     """
     Main function for the program.
-    Create a user session and starts the session
+    Create a user session and starts the session, or in server or zygote
+    mode, starts the server hosting sessions
     """
-    session = Session()
+    args = parse_args(sys.argv[1:])
+
+    if args.command == 'serve':
+        # pylint: disable=import-outside-toplevel
+        import server
+
+        # One storage object is shared by every session in the process
+        shared_storage = storage.open_storage()
+        server.serve(
+            lambda resume_token: Session(shared_storage, resume_token),
+            args.socket
+        )
+        return
+
+    if args.command == 'migrate':
+        readme_storage = storage.open_storage()
+        migrate_readmes(readme_storage, open_journal(readme_storage))
+        return
+
+    if args.command == 'generate':
+        try:
+            generate_readme(args.spec, args.out)
+        except Exception as err:  # pylint: disable=broad-except
+            print(Fore.RED + str(err) + Fore.WHITE)
+            sys.exit(1)
+        return
+
+    if args.command == 'export-all':
+        readme_storage = storage.open_storage()
+        failed = export_readmes(
+            readme_storage,
+            open_journal(readme_storage),
+            args.out,
+            args.workers
+        )
+        if failed:
+            sys.exit(1)
+        return
+
+    if args.command == 'zygote':
+        # pylint: disable=import-outside-toplevel
+        import server
+
+        # The storage is warmed up once here and inherited by every forked
+        # session process
+        zygote_storage = storage.open_storage()
+
+        def forked_session(resume_token):
+            zygote_storage.after_fork()
+            return Session(zygote_storage, resume_token)
+
+        server.serve_forked(
+            forked_session,
+            args.socket,
+            partial(warm_up, zygote_storage)
+        )
+        return
+
+    session = Session(storage.open_storage(), args.resume)
     session.start()
 
 
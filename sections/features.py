@@ -10,6 +10,7 @@ app
 from colorama import Fore
 
 import menu_helpers
+import migrations
 from .section import Section
 
 
@@ -31,13 +32,22 @@ class FeaturesSection(Section):
 
         super().__init__(readme, questions_dict, header="Features")
 
+    def display_menu(self):
+        """
+        Shows the features menu. Rather than one transaction for the whole
+        menu, each feature action is a transaction of its own (see
+        set_features), so every feature is saved as soon as it is done
+        """
+
+        self.ask_questions()
+
     def set_features(self):
         """
         Sets the site_aims attribute. Each newline entered by the
         user is treated as an individual site aim
         """
 
-        menu = menu_helpers.CHOICE_MENU_PROMPT
+        menu = dict(menu_helpers.CHOICE_MENU_PROMPT)
         menu['options'] = {
             "1": {
                 "prompt": "Add feature",
@@ -63,7 +73,13 @@ class FeaturesSection(Section):
             if response == "4":
                 break
 
-            menu['options'].get(response)['action']()
+            # Changes made by adding or editing a feature are written to
+            # the readme's store together once the feature is done
+            self.readme.begin_transaction()
+            try:
+                menu['options'].get(response)['action']()
+            finally:
+                self.readme.commit_transaction()
 
     def add_feature(self):
         """
@@ -203,31 +219,33 @@ class FeaturesSection(Section):
         """
 
         # Combine data for individual features where Data Type shows
-        # the relation between features
+        # the relation between features. Each point of note has a record
+        # of its own, keyed by the point's id
         #
         # E.g.
         #
-        # Section Type |    Data Type   | Value
-        #    Feature   | 1 | image_path | image.png
+        # Section Type |    Data Type        | Value
+        #    Feature   | 1 | image_path      | image.png
+        #    Feature   | 1 | point/3f2a9c1b  | A point
         #
         features = {}
         for row in sheet_data:
             feature_split = row.get('Data Type').split('|')
+            data_type, point_id = migrations.split_item_data_type(
+                feature_split[1]
+            )
 
             if not features.get(feature_split[0]):
-                features[feature_split[0]] = {}
+                features[feature_split[0]] = {'points': []}
 
-            if feature_split[1] == 'point_of_note':
-                if features[feature_split[0]].get(feature_split[1]):
-                    features[feature_split[0]][feature_split[1]].append(
-                        row.get('Value')
+            if data_type == 'point':
+                # Deleted points have an empty value
+                if point_id and row.get('Value'):
+                    features[feature_split[0]]['points'].append(
+                        (point_id, row.get('Value'))
                     )
-                else:
-                    features[feature_split[0]][feature_split[1]] = [
-                        row.get('Value')
-                    ]
             else:
-                features[feature_split[0]][feature_split[1]] = row.get('Value')
+                features[feature_split[0]][data_type] = row.get('Value')
 
         for key, item in features.items():
             feature = Feature(self, item.get('feature_name'), key, False)
@@ -244,6 +262,8 @@ class Feature(Section):
                  feature_name, feature_number,
                  write_to_file=True):
         self.points_of_note = []
+        # Stable ids of the points of note, in the same order
+        self.point_ids = []
         self.image_path = ""
         self.image_alt = ""
 
@@ -396,25 +416,25 @@ class Feature(Section):
                     )
                     self.points_of_note[int(response)-1] = input(' -> ')
 
-                    points_string = ""
-                    for count, point in enumerate(self.points_of_note):
-                        if count == len(self.points_of_note) - 1:
-                            points_string += point
-                        else:
-                            points_string += point + '\n'
-
-                    self.write_section_item_to_sheet(
+                    self.write_list_item(
                         self.feature_number + '|point',
-                        points_string
+                        self.point_ids[int(response)-1],
+                        self.points_of_note[int(response)-1]
                     )
                     return
 
-    def add_point_of_note(self, point):
+    def add_point_of_note(self, point, point_id=None):
         """
-        Adds an additional point to the feature
+        Adds an additional point to the feature, with a new id unless one
+        is given. Returns the point's id, or None if the point is empty
         """
-        if point:
-            self.points_of_note.append(point)
+        if not point:
+            return None
+
+        point_id = point_id or migrations.new_item_id()
+        self.points_of_note.append(point)
+        self.point_ids.append(point_id)
+        return point_id
 
     def output_points_of_note(self):
         """
@@ -427,13 +447,17 @@ class Feature(Section):
 
         return output
 
-    def delete_point_of_note(self, index_to_delete):
+    def delete_point_of_note(self, index_to_delete, write_to_file=True):
         """
         Removes a point of note from the points_of_note at the
         given index
         """
 
         del self.points_of_note[index_to_delete]
+        point_id = self.point_ids.pop(index_to_delete)
+
+        if write_to_file:
+            self.delete_list_item(self.feature_number + '|point', point_id)
 
     def add_image_path(self, image_path, write_to_file=True):
         """
@@ -493,7 +517,14 @@ class Feature(Section):
 
             point = input(Fore.YELLOW + " -> " + Fore.WHITE)
 
-            self.add_point_of_note(point)
+            point_id = self.add_point_of_note(point)
+
+            if write_to_file and point_id:
+                self.write_list_item(
+                    self.feature_number + '|point',
+                    point_id,
+                    point
+                )
 
             again = input(
                 Fore.GREEN +
@@ -511,23 +542,8 @@ class Feature(Section):
             if again == 'N':
                 break
 
-            points_string = ""
-
             menu_helpers.clear_screen()
 
-        if write_to_file:
-            points_string = ""
-            for count, point in enumerate(self.points_of_note):
-                if count == len(self.points_of_note) - 1:
-                    points_string += point
-                else:
-                    points_string += point + '\n'
-
-            self.write_section_item_to_sheet(
-                self.feature_number + '|point',
-                points_string
-            )
-
     def output_raw(self):
         """
         Outputs the content of the feature in GitHub markdown format
@@ -552,9 +568,8 @@ class Feature(Section):
                 write_to_file=False
             )
 
-        if feature_json.get('point'):
-            for point in feature_json.get('point').split('\n'):
-                self.add_point_of_note(point)
+        for point_id, point in feature_json.get('points', []):
+            self.add_point_of_note(point, point_id)
 
         if feature_json.get('image_path'):
             self.add_image_path(
@@ -23,6 +23,12 @@ class Section:
     populate_section_info()
         Loops through section questions and calls a setter function for the
         section to populate the section attribute with user input
+
+    write_list_item(data_type, item_id, value)
+        Writes a single entry of a list, e.g. one site aim
+
+    delete_list_item(data_type, item_id)
+        Deletes a single entry of a list
     """
 
     def __init__(self, readme, questions_dict, header):
@@ -36,6 +42,21 @@ class Section:
         required data needed for the section.
 
         This function handles the output and input processing of this data.
+
+        All answers are staged in a readme transaction and written to the
+        readme's store together once the questionnaire is complete.
+        """
+
+        self.readme.begin_transaction()
+        try:
+            self.ask_questions()
+        finally:
+            self.readme.commit_transaction()
+
+    def ask_questions(self):
+        """
+        Loops through the section questions, prompting the user for each
+        answer and passing it to the question's setter function
         """
 
         for question_index in self.questions_dict:
@@ -93,36 +114,33 @@ class Section:
 
                 self.questions_dict[question_index]['setter_function'](answer)
 
-    def find_section_sheet_rows(self, item):
-        """
-        Finds the rows in the spreadsheet that correspond with the section type
+    def write_section_item_to_sheet(self, item, value):
         """
+        This function takes a given attribute and value and stages them
+        to be written to the readme's store.
 
-        section_matches = self.readme.worksheet.findall(
-            self.header,
-            in_column=1
-        )
-        found_row = None
-        for cell in section_matches:
-            if self.readme.worksheet.cell(cell.row, cell.col+1).value == item:
-                found_row = cell.row
-                break
-
-        return found_row
+        If a record for this item exists, it will overwrite it
+        or else it will add a new record for the item.
 
-    def write_section_item_to_sheet(self, item, value):
+        While a section-edit transaction is open the write is held by the
+        readme until the transaction commits.
         """
-        This function takes a given attribute and value and writes them
-        to the worksheet.
 
-        If a record for this item exists, it will overwrite it
-        or else it will add a row to the bottom of the worksheet
+        self.readme.stage_write(self.header, item, value)
+
+    def write_list_item(self, data_type, item_id, value):
         """
+        Writes a single entry of a list (e.g. one site aim) as its own
+        record, keyed by the entry's stable id, so that changing one entry
+        never rewrites the rest of the list
+        """
+
+        self.write_section_item_to_sheet(f'{data_type}/{item_id}', value)
 
-        row = self.find_section_sheet_rows(item)
-        if not row:
-            row = self.readme.find_next_empty_sheet_row()
-            self.readme.worksheet.update_cell(row, 1, self.header)
-            self.readme.worksheet.update_cell(row, 2, item)
+    def delete_list_item(self, data_type, item_id):
+        """
+        Deletes a single entry of a list. The entry's record is kept with
+        an empty value, which loading skips
+        """
 
-        self.readme.worksheet.update_cell(row, 3, value)
+        self.write_section_item_to_sheet(f'{data_type}/{item_id}', '')
@@ -8,9 +8,9 @@ app
 """
 
 from colorama import Fore
-from tabulate import tabulate
 
 import menu_helpers
+import migrations
 from .section import Section
 
 
@@ -31,6 +31,11 @@ class UserExperienceSection(Section):
         self.site_aims = []
         self.target_audience = []
         self.user_stories = []
+
+        # Stable ids of the site aims and target audience entries, in the
+        # same order. User stories keep their id in the story itself
+        self.site_aim_ids = []
+        self.target_audience_ids = []
         self.flowchart = ""
 
         super().__init__(readme, {}, header="User Experience")
@@ -40,7 +45,7 @@ class UserExperienceSection(Section):
         Displays the menu for the user experience section to the user
         and calls the appropriate function based on user response
         """
-        menu = menu_helpers.CHOICE_MENU_PROMPT
+        menu = dict(menu_helpers.CHOICE_MENU_PROMPT)
         menu['options'] = {
             "1": {
                 "prompt": "Manage Site Aims",
@@ -69,14 +74,20 @@ class UserExperienceSection(Section):
         if menu['options'].get(response, {})['action'] == 'break':
             return
 
-        menu['options'].get(response, {})['action']()
+        # Changes made while managing a subsection are written to the
+        # readme's store together when the user returns from it
+        self.readme.begin_transaction()
+        try:
+            menu['options'].get(response, {})['action']()
+        finally:
+            self.readme.commit_transaction()
 
     def set_site_aims(self):
         """
         Shows a menu to allow a user to manage the site aims of the section
         """
 
-        menu = menu_helpers.CHOICE_MENU_PROMPT
+        menu = dict(menu_helpers.CHOICE_MENU_PROMPT)
         menu['options'] = {
             "1": {
                 "prompt": "Add Site Aim",
@@ -150,20 +161,12 @@ class UserExperienceSection(Section):
         print(Fore.YELLOW + "Please enter the site aim to add: " + Fore.WHITE)
         aim = input(Fore.YELLOW + ' -> ' + Fore.WHITE)
 
+        aim_id = migrations.new_item_id()
         self.site_aims.append(aim)
+        self.site_aim_ids.append(aim_id)
 
         if write_to_sheet:
-            aims_string = ""
-            for count, aim in enumerate(self.site_aims):
-                if count == len(self.site_aims) - 1:
-                    aims_string += aim
-                else:
-                    aims_string += aim + '\n'
-
-            self.write_section_item_to_sheet(
-                'aims',
-                aims_string
-            )
+            self.write_list_item('aims', aim_id, aim)
 
     def edit_site_aim(self, write_to_sheet=True):
         """
@@ -233,16 +236,10 @@ class UserExperienceSection(Section):
                     self.site_aims[int(response)-1] = aim
 
                     if write_to_sheet:
-                        aims_string = ""
-                        for count, aim in enumerate(self.site_aims):
-                            if count == len(self.site_aims) - 1:
-                                aims_string += aim
-                            else:
-                                aims_string += aim + '\n'
-
-                        self.write_section_item_to_sheet(
+                        self.write_list_item(
                             'aims',
-                            aims_string
+                            self.site_aim_ids[int(response)-1],
+                            aim
                         )
 
                     return
@@ -305,44 +302,32 @@ class UserExperienceSection(Section):
                         break
 
                     del self.site_aims[int(response)-1]
+                    aim_id = self.site_aim_ids.pop(int(response)-1)
 
                     if write_to_sheet:
-                        aims_string = ""
-                        for count, aim in enumerate(self.site_aims):
-                            if count == len(self.site_aims) - 1:
-                                aims_string += aim
-                            else:
-                                aims_string += aim + '\n'
-
-                        self.write_section_item_to_sheet(
-                            'aims',
-                            aims_string
-                        )
+                        self.delete_list_item('aims', aim_id)
 
                     return
 
-    def load_site_aims(self, site_aims):
+    def load_site_aim(self, aim_id, aim):
         """
-        Loads the site aims for the class from worksheet data
+        Loads a site aim for the class from worksheet data
         """
-        if site_aims:
-            aims_split = site_aims.split('\n')
-            for aim in aims_split:
-                if aim:
-                    self.site_aims.append(aim)
+        self.site_aims.append(aim)
+        self.site_aim_ids.append(aim_id)
 
-    def load_user_stories(self, user_stories):
+    def load_user_story(self, story_id, story):
         """
-        Loads the user stories for the class from worksheet data
+        Loads a user story, stored as 'goal|action', for the class from
+        worksheet data
         """
-        for story in user_stories.split('\n'):
-            goal = story.split('|')[0]
-            action = story.split('|')[1]
+        goal, _, action = story.partition('|')
 
-            self.user_stories.append({
-                "goal": goal,
-                "action": action
-            })
+        self.user_stories.append({
+            "goal": goal,
+            "action": action,
+            "id": story_id
+        })
 
     def load_flowchart(self, flowchart):
         """
@@ -369,7 +354,7 @@ class UserExperienceSection(Section):
         audience of the section
         """
 
-        menu = menu_helpers.CHOICE_MENU_PROMPT
+        menu = dict(menu_helpers.CHOICE_MENU_PROMPT)
         menu['options'] = {
             "1": {
                 "prompt": "Add Target Audience",
@@ -448,19 +433,15 @@ class UserExperienceSection(Section):
         )
         target_audience = input(Fore.YELLOW + ' -> ' + Fore.WHITE)
 
+        target_audience_id = migrations.new_item_id()
         self.target_audience.append(target_audience)
+        self.target_audience_ids.append(target_audience_id)
 
         if write_to_sheet:
-            target_audience_string = ""
-            for count, target_audience in enumerate(self.target_audience):
-                if count == len(self.target_audience) - 1:
-                    target_audience_string += target_audience
-                else:
-                    target_audience_string += target_audience + '\n'
-
-            self.write_section_item_to_sheet(
+            self.write_list_item(
                 'target_audience',
-                target_audience_string
+                target_audience_id,
+                target_audience
             )
 
     def edit_target_audience(self, write_to_sheet=True):
@@ -539,19 +520,10 @@ class UserExperienceSection(Section):
                     self.target_audience[int(response)-1] = target_audience
 
                     if write_to_sheet:
-                        target_audience_string = ""
-                        for count, target_audience in enumerate(
-                            self.target_audience
-                        ):
-                            if count == len(self.target_audience) - 1:
-                                target_audience_string += target_audience
-                            else:
-                                target_audience_string += target_audience
-                                target_audience += '\n'
-
-                        self.write_section_item_to_sheet(
+                        self.write_list_item(
                             'target_audience',
-                            target_audience_string
+                            self.target_audience_ids[int(response)-1],
+                            target_audience
                         )
 
                     return
@@ -618,36 +590,24 @@ class UserExperienceSection(Section):
                         break
 
                     del self.target_audience[int(response)-1]
+                    target_audience_id = self.target_audience_ids.pop(
+                        int(response)-1
+                    )
 
                     if write_to_sheet:
-                        target_audience_string = ""
-                        for count, target_audience in enumerate(
-                            self.target_audience
-                        ):
-                            if count == len(self.target_audience) - 1:
-                                target_audience_string += target_audience
-                            else:
-                                target_audience_string += target_audience
-                                target_audience_string += '\n'
-
-                        self.write_section_item_to_sheet(
+                        self.delete_list_item(
                             'target_audience',
-                            target_audience_string
+                            target_audience_id
                         )
 
                     return
 
-    def load_target_audience(self, target_audience):
+    def load_target_audience(self, target_audience_id, target_audience):
         """
-        Sets the target_audience attribute. Each newline entered by the
-        user is treated as an individual target audience entry
+        Loads a target audience entry for the class from worksheet data
         """
-
-        if target_audience:
-            audience_split = target_audience.split('\n')
-            for target in audience_split:
-                if target:
-                    self.target_audience.append(target)
+        self.target_audience.append(target_audience)
+        self.target_audience_ids.append(target_audience_id)
 
     def output_target_audience(self):
         """
@@ -668,7 +628,7 @@ class UserExperienceSection(Section):
         user is treated as an individual site aim
         """
 
-        menu = menu_helpers.CHOICE_MENU_PROMPT
+        menu = dict(menu_helpers.CHOICE_MENU_PROMPT)
         menu['options'] = {
             "1": {
                 "prompt": "Add story",
@@ -759,23 +719,18 @@ class UserExperienceSection(Section):
         print(Fore.YELLOW + "What is the goal of this story? " + Fore.WHITE)
         goal = input(Fore.YELLOW + ' -> ' + Fore.WHITE)
 
+        story_id = migrations.new_item_id()
         self.user_stories.append({
             "goal": goal,
-            "action": action
+            "action": action,
+            "id": story_id
         })
 
         if write_to_sheet:
-            stories_string = ""
-            for count, story in enumerate(self.user_stories):
-                if count == len(self.user_stories) - 1:
-                    stories_string += story['goal'] + '|' + story['action']
-                else:
-                    stories_string += story['goal'] + '|'
-                    stories_string += story['action'] + '\n'
-
-            self.write_section_item_to_sheet(
+            self.write_list_item(
                 'user_stories',
-                stories_string
+                story_id,
+                goal + '|' + action
             )
 
     def edit_story(self, write_to_sheet=True):
@@ -854,24 +809,18 @@ class UserExperienceSection(Section):
                     )
                     goal = input(Fore.YELLOW + ' -> ' + Fore.WHITE)
 
+                    story_id = self.user_stories[int(response)-1]['id']
                     self.user_stories[int(response)-1] = {
                         "goal": goal,
-                        "action": action
+                        "action": action,
+                        "id": story_id
                     }
 
                     if write_to_sheet:
-                        stories_string = ""
-                        for count, story in enumerate(self.user_stories):
-                            if count == len(self.user_stories) - 1:
-                                stories_string += story['goal'] + '|'
-                                stories_string += story['action']
-                            else:
-                                stories_string += story['goal'] + '|'
-                                stories_string += story['action'] + '\n'
-
-                        self.write_section_item_to_sheet(
+                        self.write_list_item(
                             'user_stories',
-                            stories_string
+                            story_id,
+                            goal + '|' + action
                         )
 
                     return
@@ -937,30 +886,23 @@ class UserExperienceSection(Section):
                     if confirmed == 'N':
                         break
 
-                    del self.user_stories[int(response)-1]
+                    story = self.user_stories.pop(int(response)-1)
 
                     if write_to_sheet:
-                        stories_string = ""
-                        for count, story in enumerate(self.user_stories):
-                            if count == len(self.user_stories) - 1:
-                                stories_string += story['goal'] + '|'
-                                stories_string += story['action']
-                            else:
-                                stories_string += story['goal'] + '|'
-                                stories_string += story['action'] + '\n'
-
-                        self.write_section_item_to_sheet(
-                            'user_stories',
-                            stories_string
-                        )
+                        self.delete_list_item('user_stories', story['id'])
 
                     return
 
     def output_user_stories(self):
         """
         Outputs the user_stories attribute in GitHub Markdown format
-        using tabulate library to format the table
+        using tabulate library to format the table.
+
+        tabulate is only imported once a readme is output so that it does
+        not slow down the app starting.
         """
+        # pylint: disable=import-outside-toplevel
+        from tabulate import tabulate
 
         headers = ["ID", "GOAL", "ACTION"]
         rows = []
@@ -1025,18 +967,27 @@ class UserExperienceSection(Section):
         """
         Given data from a google spreadsheet readme, this
         function reads the data for its attributes and populates
-        them
+        them.
+
+        Each site aim, target audience entry and user story has a record of
+        its own, e.g. 'aims/<id>'. Records of deleted entries have an
+        empty value and are skipped
         """
 
         for row in sheet_data:
-            if row.get('Data Type') == 'aims':
-                site_aims = row.get('Value')
-                self.load_site_aims(site_aims)
-            elif row.get('Data Type') == 'target_audience':
-                target_audience = row.get('Value')
-                self.load_target_audience(target_audience)
-            elif row.get('Data Type') == 'user_stories':
-                stories = row.get('Value')
-                self.load_user_stories(stories)
-            elif row.get('Data Type') == 'flowchart':
-                self.load_flowchart(row.get('Value'))
+            data_type, item_id = migrations.split_item_data_type(
+                row.get('Data Type')
+            )
+            value = row.get('Value')
+
+            if item_id and not value:
+                continue
+
+            if data_type == 'aims' and item_id:
+                self.load_site_aim(item_id, value)
+            elif data_type == 'target_audience' and item_id:
+                self.load_target_audience(item_id, value)
+            elif data_type == 'user_stories' and item_id:
+                self.load_user_story(item_id, value)
+            elif data_type == 'flowchart':
+                self.load_flowchart(value)
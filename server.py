@@ -0,0 +1,292 @@
+"""
+This module runs Readme Generator in server mode.
+
+Rather than the web front end starting a new 'python3 run.py' for every
+websocket, one long-lived process listens on a local unix socket and
+hosts a Session for each connection. Every session pays the cost of
+starting Python, importing gspread and authenticating just once, and they
+all share one storage object (and with it the spreadsheet connection and
+worksheet cache).
+
+asyncio handles the connections. Each Session runs its menus on its own
+thread, with input()/print() bound to a TerminalConsole for its
+connection.
+
+Every connection starts with a handshake line, 'resume <token>', naming
+the resume token of the browser tab (or 'resume' alone for none), so that
+the session can pick up where the tab's last session left off.
+
+In zygote mode the process instead warms up once (importing everything
+and authenticating), freezes its heap and then forks a child process per
+connection. Each session keeps a process of its own, but starts in
+milliseconds and shares the warmed-up memory pages with the zygote.
+"""
+
+import asyncio
+import gc
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import traceback
+
+import session_io
+
+HANDSHAKE_PREFIX = b'resume'
+
+
+def parse_handshake(line):
+    """
+    Returns the resume token named by a connection's handshake line, or
+    None if there is none
+    """
+
+    words = line.strip().split()
+
+    if len(words) != 2 or words[0] != HANDSHAKE_PREFIX:
+        return None
+
+    return words[1].decode('ascii', 'replace')
+
+
+class SessionConnection:
+    """
+    A class to represent one connected terminal and the session hosted
+    for it.
+
+    ...
+
+    Attributes
+    ----------
+    reader : asyncio.StreamReader
+        Bytes typed by the user
+    writer : asyncio.StreamWriter
+        Bytes sent back to the terminal
+    incoming : queue.Queue
+        Typed bytes handed from the event loop to the session thread
+    """
+
+    def __init__(self, loop, reader, writer):
+        self.loop = loop
+        self.reader = reader
+        self.writer = writer
+        self.incoming = queue.Queue()
+
+    def read_bytes(self):
+        """
+        Called on the session thread. Waits for the next bytes typed by
+        the user, b'' once the connection has closed
+        """
+        return self.incoming.get()
+
+    def write_bytes(self, data):
+        """
+        Called on the session thread. Hands bytes to the event loop to send
+        """
+        self.loop.call_soon_threadsafe(self.writer.write, data)
+
+    async def pump_input(self):
+        """
+        Feeds bytes from the connection to the session thread until the
+        connection closes
+        """
+        try:
+            while True:
+                data = await self.reader.read(4096)
+                self.incoming.put(data)
+                if not data:
+                    return
+        except ConnectionError:
+            self.incoming.put(b'')
+
+
+def run_session(session_factory, console, resume_token):
+    """
+    Runs a session on the current thread, with its input and output bound
+    to the given console. Returns once the user exits or disconnects
+
+        Parameters:
+            session_factory (function): Returns a new Session for a resume
+            token
+            console (TerminalConsole): The session's terminal
+            resume_token (str): From the connection's handshake, or None
+    """
+
+    session_io.bind_console(console)
+    session = session_factory(resume_token)
+    try:
+        session.start()
+    except SystemExit:
+        pass
+    finally:
+        # Make sure nothing typed is lost if the user simply went away,
+        # then stop the session's writer thread
+        session.writer.flush()
+        session.writer.close()
+        session_io.bind_console(None)
+
+
+async def handle_connection(session_factory, reader, writer):
+    """
+    Hosts a session for a new connection until it ends
+    """
+
+    loop = asyncio.get_running_loop()
+
+    try:
+        resume_token = parse_handshake(await reader.readline())
+    except ConnectionError:
+        writer.close()
+        return
+
+    connection = SessionConnection(loop, reader, writer)
+    console = session_io.TerminalConsole(
+        connection.read_bytes,
+        connection.write_bytes
+    )
+
+    finished = loop.create_future()
+
+    def session_thread():
+        try:
+            run_session(session_factory, console, resume_token)
+        finally:
+            loop.call_soon_threadsafe(finished.set_result, None)
+
+    threading.Thread(target=session_thread, daemon=True).start()
+    pump = asyncio.ensure_future(connection.pump_input())
+
+    await finished
+
+    pump.cancel()
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+
+
+async def serve_forever(session_factory, socket_path):
+    """
+    Listens on a unix socket, hosting a session for each connection
+    """
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: handle_connection(
+            session_factory, reader, writer
+        ),
+        path=socket_path
+    )
+
+    async with server:
+        await server.serve_forever()
+
+
+def serve(session_factory, socket_path):
+    """
+    Runs the server, hosting sessions made by session_factory for
+    connections to the unix socket at socket_path
+    """
+
+    session_io.install_session_streams()
+    asyncio.run(serve_forever(session_factory, socket_path))
+
+
+def serve_forked(session_factory, socket_path, warm_up):
+    """
+    Runs the zygote: warms up once, then forks a child process hosting a
+    session made by session_factory for every connection to the unix
+    socket at socket_path
+
+        Parameters:
+            session_factory (function): Returns a new Session
+            socket_path (str): Path of the unix socket to listen on
+            warm_up (function): Imports and authenticates everything the
+            sessions will need
+    """
+
+    warm_up()
+
+    # Move everything created so far out of the garbage collector's reach,
+    # so that collections in the children do not touch (and so copy) the
+    # memory pages they share with the zygote
+    gc.freeze()
+
+    # Children are never waited on, let the kernel reap them
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen()
+
+    while True:
+        connection, _ = listener.accept()
+
+        if os.fork() == 0:
+            listener.close()
+            run_forked_session(session_factory, connection)
+
+        connection.close()
+
+
+def run_forked_session(session_factory, connection):
+    """
+    Called in a freshly forked child. Hosts a session for the connection,
+    then exits the child process
+    """
+
+    exit_code = 0
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        session_io.install_session_streams()
+
+        def read_bytes():
+            try:
+                return connection.recv(4096)
+            except OSError:
+                return b''
+
+        # Anything typed after the handshake line in the same read is
+        # handed to the session first
+        received = b''
+        while b'\n' not in received:
+            data = read_bytes()
+            if not data:
+                break
+            received += data
+
+        line, _, typed = received.partition(b'\n')
+
+        def read_bytes_after_handshake():
+            nonlocal typed
+            if typed:
+                data, typed = typed, b''
+                return data
+            return read_bytes()
+
+        console = session_io.TerminalConsole(
+            read_bytes_after_handshake,
+            connection.sendall
+        )
+        run_session(session_factory, console, parse_handshake(line))
+    except SystemExit:
+        exit_code = 1
+    except BaseException:  # pylint: disable=broad-except
+        # The child skips the interpreter's shutdown, which would print
+        # this, so print it to the stderr shared with the zygote
+        traceback.print_exc()
+        sys.stderr.flush()
+        exit_code = 1
+    finally:
+        connection.close()
+        # Skip the interpreter's normal shutdown, which would run clean up
+        # belonging to the zygote
+        os._exit(exit_code)  # pylint: disable=protected-access
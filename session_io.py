@@ -0,0 +1,184 @@
+"""
+This module lets many sessions share one process, each with its own
+terminal.
+
+The app reads and writes its terminal through input() and print(), i.e.
+through sys.stdin and sys.stdout. install_session_streams() replaces those
+with proxies that forward to the console bound to the current thread, so
+a session running on its own thread only ever talks to its own user.
+
+A TerminalConsole talks to a remote terminal (e.g. xterm.js in the
+browser) over a raw byte stream. As there is no pty in between, it does
+the work of the pty's line discipline itself: echoing typed characters,
+handling backspace, enter, Ctrl+D and Ctrl+C, and turning newlines into
+carriage return/newline pairs.
+"""
+
+import codecs
+import sys
+import threading
+
+SESSION_STREAMS = threading.local()
+
+
+class SessionClosed(SystemExit):
+    """
+    Raised in a session's thread when its terminal has disconnected or the
+    user has pressed Ctrl+C. Derived from SystemExit, so it ends the session
+    just like choosing 'Exit' from the main menu
+    """
+
+
+class TerminalConsole:
+    """
+    A class to represent a remote terminal, used as both the stdin and the
+    stdout of a session.
+
+    ...
+
+    Attributes
+    ----------
+    read_bytes : function
+        Returns the next chunk of bytes typed by the user, or b'' once the
+        terminal has disconnected
+    write_bytes : function
+        Sends bytes to the terminal
+    closed : bool
+        True once the terminal has disconnected
+    """
+
+    def __init__(self, read_bytes, write_bytes):
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+        self.closed = False
+        self.decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        self.typed = ""
+        self.in_escape = False
+        self.after_carriage_return = False
+
+    def write(self, text):
+        """
+        Writes text to the terminal, translating newlines as a pty would
+        """
+
+        if self.closed:
+            return len(text)
+
+        try:
+            self.write_bytes(
+                text.replace('\r\n', '\n').replace('\n', '\r\n')
+                .encode('utf-8')
+            )
+        except OSError:
+            self.closed = True
+
+        return len(text)
+
+    def flush(self):
+        """
+        Writes are sent straight away, so there is nothing to flush
+        """
+
+    def isatty(self):
+        """
+        Returns False, so input() reads through readline()
+        """
+        return False
+
+    def readline(self):
+        """
+        Reads one line typed by the user, echoing it back as it is typed.
+
+            Returns:
+                line (str): The line including its newline, the line without
+                a newline if Ctrl+D ended it, or '' for Ctrl+D on an empty
+                line (end of input)
+        """
+
+        line = ""
+
+        while True:
+            if not self.typed:
+                data = b'' if self.closed else self.read_bytes()
+                if not data:
+                    self.closed = True
+                    raise SessionClosed()
+                self.typed = self.decoder.decode(data)
+                continue
+
+            char = self.typed[0]
+            self.typed = self.typed[1:]
+
+            after_carriage_return = self.after_carriage_return
+            self.after_carriage_return = char == '\r'
+
+            if self.in_escape:
+                # Skip cursor keys and the like: ESC [ ... final letter
+                if char.isalpha() or char == '~':
+                    self.in_escape = False
+            elif char == '\x1b':
+                self.in_escape = True
+            elif char == '\n' and after_carriage_return:
+                continue
+            elif char in ('\r', '\n'):
+                self.write('\n')
+                return line + '\n'
+            elif char in ('\x7f', '\b'):
+                if line:
+                    line = line[:-1]
+                    self.write('\b \b')
+            elif char == '\x04':
+                if not line:
+                    return ''
+                return line
+            elif char == '\x03':
+                self.write('^C\n')
+                self.closed = True
+                raise SessionClosed()
+            elif char.isprintable() or char == '\t':
+                line += char
+                self.write(char)
+
+
+class SessionStream:
+    """
+    A class to represent sys.stdin or sys.stdout, forwarding to the
+    console bound to the current thread, or to the original stream for
+    threads without one.
+
+    ...
+
+    Attributes
+    ----------
+    default : file
+        The original stream
+    """
+
+    def __init__(self, default):
+        self.default = default
+
+    def __getattr__(self, name):
+        return getattr(
+            getattr(SESSION_STREAMS, 'console', None) or self.default,
+            name
+        )
+
+
+def install_session_streams():
+    """
+    Replaces sys.stdin and sys.stdout with per-thread session streams.
+    Safe to call more than once
+    """
+
+    if not isinstance(sys.stdout, SessionStream):
+        sys.stdin = SessionStream(sys.stdin)
+        sys.stdout = SessionStream(sys.stdout)
+
+
+def bind_console(console):
+    """
+    Binds a console to the current thread, so that the thread's input()
+    and print() calls use it. Pass None to unbind
+    """
+
+    SESSION_STREAMS.console = console
@@ -0,0 +1,8 @@
+from .storage import Storage, ReadmeStore
+from .google_sheets import GoogleSheetsStorage
+from .sharding import ShardedGoogleSheetsStorage
+from .sqlite import SQLiteStorage
+from .backends import open_storage
+from .journal import WriteJournal
+from .writer import WriteBehindQueue
+from .snapshots import SessionSnapshots
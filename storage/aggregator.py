@@ -0,0 +1,131 @@
+"""
+This module contains the write aggregator shared by every Google Sheets
+readme store in the process.
+
+Overwriting existing cells is the most common write. Rather than each
+readme sending its own request, the cell updates of every readme of a
+spreadsheet, from every session in the process, are gathered over a
+short window and sent as a single spreadsheet values batch update. The
+number of write requests then grows with the number of windows rather
+than with the number of users.
+"""
+
+import os
+import threading
+import time
+
+# Seconds cell updates are gathered for before they are sent
+WRITE_WINDOW = float(os.environ.get('README_GENERATOR_WRITE_WINDOW', 0.1))
+
+
+class WriteBatch:
+    """
+    A class to represent the cell updates gathered in one window.
+
+    ...
+
+    Attributes
+    ----------
+    data : dict
+        Maps each absolute A1 range to the values to write to it
+    writers : int
+        Number of callers whose updates are in the batch
+    done : threading.Event
+        Set once the batch has been sent
+    error : Exception
+        The error raised sending the batch, if any
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.writers = 0
+        self.done = threading.Event()
+        self.error = None
+
+
+class WriteAggregator:
+    """
+    A class to represent the gathering of cell updates to one spreadsheet.
+
+    The first caller of a window waits for the window to pass and then
+    sends the batch. Callers arriving during the window add their updates
+    and wait for it to be sent.
+
+    ...
+
+    Attributes
+    ----------
+    spreadsheet : gspread Spreadsheet
+        The spreadsheet the updates are written to
+    window : float
+        Seconds updates are gathered for
+    batch : WriteBatch
+        The batch being gathered, None between windows
+    """
+
+    def __init__(self, spreadsheet, window=WRITE_WINDOW):
+        self.spreadsheet = spreadsheet
+        self.window = window
+        self.lock = threading.Lock()
+        self.batch = None
+
+    def update(self, data):
+        """
+        Writes cell updates as part of the current window's batch, waiting
+        until the batch has been sent. If a batch shared with other callers
+        fails, the caller's own updates are retried alone, so that one
+        failing update (e.g. to a deleted worksheet) cannot fail them all.
+
+            Parameters:
+                data (list): Updates of the form {'range': A1 range
+                including the worksheet title, 'values': [[value]]}
+        """
+
+        with self.lock:
+            batch = self.batch
+            first_writer = batch is None
+
+            if first_writer:
+                batch = self.batch = WriteBatch()
+
+            batch.writers += 1
+            for update in data:
+                batch.data[update['range']] = update['values']
+
+        if first_writer:
+            time.sleep(self.window)
+
+            with self.lock:
+                self.batch = None
+
+            try:
+                self.send(batch.data)
+            except Exception as err:  # pylint: disable=broad-except
+                batch.error = err
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is None:
+            return
+
+        if batch.writers == 1:
+            raise batch.error
+
+        self.send({update['range']: update['values'] for update in data})
+
+    def send(self, data):
+        """
+        Sends cell updates as one spreadsheet values batch update. Values
+        are stored exactly as given (RAW), never parsed as formulas or
+        numbers
+        """
+
+        self.spreadsheet.values_batch_update({
+            'valueInputOption': 'RAW',
+            'data': [
+                {'range': cell_range, 'values': values}
+                for cell_range, values in data.items()
+            ]
+        })
@@ -0,0 +1,51 @@
+"""
+This module chooses the storage backend used by the app.
+
+The backend is selected with the README_GENERATOR_STORAGE environment
+variable:
+
+    sheets (default)  Google Sheets, the 'readme_generator' spreadsheet,
+                      or if README_GENERATOR_SHARDS lists several
+                      spreadsheets (comma separated), readmes sharded
+                      across them
+    sqlite            A local SQLite database at README_GENERATOR_DB
+                      (defaults to readme_generator.db)
+"""
+
+import os
+
+from .google_sheets import GoogleSheetsStorage
+from .sharding import ShardedGoogleSheetsStorage
+from .sqlite import SQLiteStorage
+
+
+def open_storage(backend=None):
+    """
+    Returns the storage object for the configured backend
+
+        Parameters:
+            backend (str): Overrides the README_GENERATOR_STORAGE
+            environment variable
+
+        Returns:
+            storage (Storage): The storage object for the backend
+    """
+    backend = backend or os.environ.get('README_GENERATOR_STORAGE', 'sheets')
+
+    if backend == 'sheets':
+        shard_names = os.environ.get('README_GENERATOR_SHARDS', '')
+        shards = [
+            name.strip() for name in shard_names.split(',') if name.strip()
+        ]
+
+        if len(shards) > 1:
+            return ShardedGoogleSheetsStorage(shards)
+
+        return GoogleSheetsStorage()
+
+    if backend == 'sqlite':
+        return SQLiteStorage(
+            os.environ.get('README_GENERATOR_DB', 'readme_generator.db')
+        )
+
+    raise Exception(f"Unknown storage backend: {backend}")
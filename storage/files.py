@@ -0,0 +1,66 @@
+"""
+This module contains the helpers used by every local file the app keeps
+(the journal, token cache, records cache and session snapshots) and by
+exports, so that locking and atomic writes behave the same everywhere.
+"""
+
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(lock_path):
+    """
+    Holds an exclusive lock on lock_path for the duration of a with block.
+    The lock is shared between threads and processes: flock locks belong
+    to an open file, and every call opens the file afresh. The lock file is
+    created readable by its owner only
+    """
+
+    lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the file releases the lock
+        os.close(lock_fd)
+
+
+def write_atomically(path, data, mode=0o600):
+    """
+    Replaces the file at path with data. The data is written in full, and
+    synced to disk, under a temporary name unique to the writing process
+    and thread, then moved into place, so readers only ever see the old or
+    the new file and concurrent writers never share a temporary file
+
+        Parameters:
+            path (str): The file to replace
+            data (str or bytes): The new contents, str is encoded as UTF-8
+            mode (int): Permissions of a newly created file
+    """
+
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    file_descriptor = os.open(
+        temp_path,
+        os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+        mode
+    )
+
+    try:
+        with os.fdopen(file_descriptor, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
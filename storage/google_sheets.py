@@ -0,0 +1,563 @@
+"""
+This module contains the Google Sheets storage backend.
+
+Each readme is stored as a worksheet of the 'readme_generator'
+spreadsheet, with a header row of 'Section Type', 'Data Type' and 'Value'
+followed by one row per record.
+
+gspread and google-auth are slow to import, so they are only imported,
+and the service account only authenticated, the first time the
+spreadsheet is needed rather than when the app starts. The authorized
+client and spreadsheet handle are then shared by every storage object in
+the process (see sheets_client).
+"""
+
+import os
+import random
+import re
+import threading
+import time
+
+from .records_cache import RecordsCache
+from .storage import Storage, ReadmeStore
+
+HEADER = ['Section Type', 'Data Type', 'Value']
+
+# Worksheet mapping readmes to spreadsheets when readmes are sharded across
+# several spreadsheets (see sharding). It is not a readme itself
+DIRECTORY_TITLE = '_directory'
+
+# How long, in seconds, the list of worksheets is trusted before the
+# spreadsheet metadata is fetched again
+WORKSHEETS_TTL = float(os.environ.get('README_GENERATOR_METADATA_TTL', 300))
+
+# Values are stored exactly as given. Parsed as if typed in, a value (or a
+# chunk of a long value) starting with e.g. '=', '+' or "'" would be turned
+# into a formula, a number or lose its first character
+VALUE_INPUT_OPTION = 'RAW'
+
+# Most worksheet ranges read in a single batched values request
+BATCH_GET_SIZE = 50
+
+# Where snapshots of readme worksheets are kept between loads
+RECORDS_CACHE_DIR = os.environ.get(
+    'README_GENERATOR_CACHE_DIR',
+    '.readme_generator_cache'
+)
+
+
+def sheet_records(sheet_rows):
+    """
+    Returns the records held by the values of a readme worksheet, header
+    row included
+    """
+
+    # Records start on row 2, below the header row. Blank rows, e.g. left
+    # by a rewrite whose final shrink failed, hold no record
+    return [
+        dict(zip(HEADER, row + [''] * (len(HEADER) - len(row))))
+        for row in sheet_rows[1:]
+        if any(row)
+    ]
+
+
+class GoogleSheetsStorage(Storage):
+    """
+    A class to represent readmes stored in a Google spreadsheet, one
+    worksheet per readme.
+
+    ...
+
+    Attributes
+    ----------
+    creds_file : str
+        Path to the service account credentials
+    spreadsheet_name : str
+        The name of the spreadsheet holding the readme worksheets
+    worksheets : dict
+        Cached worksheet handles keyed by title, fetched with a single
+        metadata call and trusted for WORKSHEETS_TTL seconds
+    aggregator : WriteAggregator
+        Gathers cell updates to the spreadsheet from every readme in the
+        process into shared batch updates
+    records_cache : RecordsCache
+        Snapshots of readme worksheets, reused while the spreadsheet is
+        unchanged
+    """
+
+    def __init__(self, creds_file='creds.json',
+                 spreadsheet_name='readme_generator'):
+        self.creds_file = creds_file
+        self.spreadsheet_name = spreadsheet_name
+        self.spreadsheet = None
+        self.aggregator = None
+        self.records_cache = None
+        self.lock = threading.Lock()
+
+        self.worksheets = None
+        self.worksheets_fetched_at = 0
+        self.worksheets_lock = threading.Lock()
+
+    def get_spreadsheet(self):
+        """
+        Returns the spreadsheet holding the readme worksheets, importing
+        gspread and authenticating on first use
+        """
+
+        with self.lock:
+            if self.spreadsheet is None:
+                # pylint: disable=import-outside-toplevel
+                from . import sheets_client
+
+                self.spreadsheet = sheets_client.open_spreadsheet(
+                    self.creds_file,
+                    self.spreadsheet_name
+                )
+                self.aggregator = sheets_client.get_write_aggregator(
+                    self.creds_file,
+                    self.spreadsheet_name
+                )
+                self.records_cache = RecordsCache(
+                    RECORDS_CACHE_DIR,
+                    self.spreadsheet
+                )
+
+        return self.spreadsheet
+
+    def get_worksheets(self):
+        """
+        Returns the cached worksheet handles keyed by title, fetching the
+        spreadsheet metadata if the cache is empty or has expired
+        """
+
+        with self.worksheets_lock:
+            expired = time.monotonic() - self.worksheets_fetched_at > \
+                WORKSHEETS_TTL
+
+            if self.worksheets is None or expired:
+                self.worksheets = {
+                    worksheet.title: worksheet
+                    for worksheet in self.get_spreadsheet().worksheets()
+                }
+                self.worksheets_fetched_at = time.monotonic()
+
+            return self.worksheets
+
+    def invalidate_worksheets(self):
+        """
+        Empties the worksheet cache, so the next use fetches the
+        spreadsheet metadata again
+        """
+
+        with self.worksheets_lock:
+            self.worksheets = None
+
+    def prefetch(self):
+        """
+        Authenticates, opens the spreadsheet and fills the worksheet cache
+        """
+        self.get_worksheets()
+
+    def after_fork(self):
+        """
+        Gives the forked child its own HTTP session. The child keeps the
+        parent's credentials, spreadsheet and worksheet cache, but the
+        parent's pooled connections must not be shared with it
+        """
+        self.lock = threading.Lock()
+        self.worksheets_lock = threading.Lock()
+
+        if self.spreadsheet is not None:
+            # pylint: disable=import-outside-toplevel
+            from . import sheets_client
+
+            sheets_client.after_fork()
+            self.aggregator = sheets_client.get_write_aggregator(
+                self.creds_file,
+                self.spreadsheet_name
+            )
+
+    def scope(self):
+        """
+        Returns the name of the spreadsheet holding the readmes
+        """
+        return f'sheets:{self.spreadsheet_name}'
+
+    def list_readmes(self):
+        """
+        Returns the titles of all readme worksheets in the spreadsheet
+        """
+        return [
+            title for title in self.get_worksheets()
+            if title != DIRECTORY_TITLE
+        ]
+
+    def create_readme(self, title):
+        """
+        Creates a worksheet with a header row for a new readme and returns
+        its ReadmeStore.
+
+        The worksheet is created and its header written by a single
+        spreadsheet batch update. The update is atomic, so if a worksheet
+        with this title already exists the request fails as a whole and
+        no separate existence check is needed.
+        """
+        # pylint: disable=import-outside-toplevel
+        from gspread.exceptions import APIError
+        from gspread.worksheet import Worksheet
+
+        spreadsheet = self.get_spreadsheet()
+
+        # The new sheet's id is chosen here so that the header can be
+        # written to it in the same request that creates it
+        sheet_id = random.randrange(1, 2 ** 31)
+
+        body = {
+            "requests": [
+                {
+                    "addSheet": {
+                        "properties": {
+                            "sheetId": sheet_id,
+                            "title": title,
+                            "sheetType": "GRID",
+                            "gridProperties": {
+                                "rowCount": 1,
+                                "columnCount": len(HEADER)
+                            }
+                        }
+                    }
+                },
+                {
+                    "updateCells": {
+                        "start": {
+                            "sheetId": sheet_id,
+                            "rowIndex": 0,
+                            "columnIndex": 0
+                        },
+                        "rows": [{
+                            "values": [
+                                {"userEnteredValue": {"stringValue": value}}
+                                for value in HEADER
+                            ]
+                        }],
+                        "fields": "userEnteredValue"
+                    }
+                }
+            ]
+        }
+
+        try:
+            response = spreadsheet.batch_update(body)
+        except APIError as err:
+            # The cache may have been stale (e.g. the worksheet was created
+            # by another session), so make sure it is fetched again
+            self.invalidate_worksheets()
+
+            if 'already exists' in str(err):
+                raise Exception(
+                    'A worksheet with this name already exists! '
+                    'Please try again'
+                ) from err
+            raise
+
+        worksheet = Worksheet(
+            spreadsheet,
+            response['replies'][0]['addSheet']['properties']
+        )
+
+        # Keep the cache in step with the spreadsheet without fetching the
+        # metadata again
+        with self.worksheets_lock:
+            if self.worksheets is not None:
+                self.worksheets[title] = worksheet
+
+        store = GoogleSheetsReadmeStore(
+            worksheet,
+            self.aggregator,
+            self.records_cache
+        )
+
+        # Only the header row has been written to the new worksheet
+        store.next_empty_row = 2
+        return store
+
+    def open_readme(self, title):
+        """
+        Returns the ReadmeStore for an existing readme worksheet. If the
+        worksheet is not in the cache, the cache may be stale, so it is
+        refreshed once before giving up
+        """
+
+        worksheet = self.get_worksheets().get(title)
+
+        if worksheet is None:
+            self.invalidate_worksheets()
+            worksheet = self.get_worksheets().get(title)
+
+        if worksheet is None:
+            raise Exception(f"No readme found with the name: {title}")
+
+        return GoogleSheetsReadmeStore(
+            worksheet,
+            self.aggregator,
+            self.records_cache
+        )
+
+    def load_readmes(self, titles):
+        """
+        Returns the records of several readmes, keyed by title. Readmes
+        with an up to date local snapshot are taken from it, the rest are
+        read BATCH_GET_SIZE worksheets at a time with batched values
+        requests rather than a request per worksheet
+        """
+        # pylint: disable=import-outside-toplevel
+        from gspread.utils import absolute_range_name
+
+        spreadsheet = self.get_spreadsheet()
+        revision = self.records_cache.revision()
+
+        sheet_values = {}
+        missing = []
+
+        for title in titles:
+            sheet_rows = self.records_cache.load(title, revision)
+            if sheet_rows is None:
+                missing.append(title)
+            else:
+                sheet_values[title] = sheet_rows
+
+        for start in range(0, len(missing), BATCH_GET_SIZE):
+            batch = missing[start:start + BATCH_GET_SIZE]
+            response = spreadsheet.values_batch_get(
+                [absolute_range_name(title, 'A:C') for title in batch]
+            )
+
+            for title, value_range in zip(batch, response['valueRanges']):
+                sheet_rows = value_range.get('values', [])
+                self.records_cache.save(title, revision, sheet_rows)
+                sheet_values[title] = sheet_rows
+
+        return {
+            title: sheet_records(sheet_values[title])
+            for title in titles
+        }
+
+
+class GoogleSheetsReadmeStore(ReadmeStore):
+    """
+    A class to represent a readme stored in a single worksheet.
+
+    ...
+
+    Attributes
+    ----------
+    title : str
+        The title of the readme, which is also the worksheet title
+    worksheet : gspread Worksheet
+        The worksheet holding the readme records
+    aggregator : WriteAggregator
+        Sends overwrites of existing cells, batched with those of other
+        readmes in the spreadsheet
+    records_cache : RecordsCache
+        Snapshots of the worksheet, reused while the spreadsheet is
+        unchanged
+    row_index : dict
+        Maps (Section Type, Data Type) to the worksheet row holding it so
+        that existing items can be located without any API calls
+    next_empty_row : int
+        The next empty worksheet row. Seeded once when the readme is
+        loaded or created and advanced locally on each append
+    """
+
+    def __init__(self, worksheet, aggregator, records_cache):
+        self.title = worksheet.title
+        self.worksheet = worksheet
+        self.aggregator = aggregator
+        self.records_cache = records_cache
+        self.row_index = {}
+        self.next_empty_row = None
+
+    def load_records(self):
+        """
+        Reads the worksheet with a single ranged values fetch (A:C) and
+        builds the records, the row index and the next empty row from it.
+
+        If the spreadsheet has not changed since the worksheet was last
+        read, the values are taken from the local snapshot instead, at the
+        cost of a single metadata call
+        """
+
+        revision = self.records_cache.revision()
+        sheet_rows = self.records_cache.load(self.title, revision)
+
+        if sheet_rows is None:
+            sheet_rows = self.worksheet.get_values('A:C')
+            self.records_cache.save(self.title, revision, sheet_rows)
+
+        self.index_sheet_values(sheet_rows)
+
+        return sheet_records(sheet_rows)
+
+    def write_items(self, items):
+        """
+        Writes items to the worksheet.
+
+        Existing rows are located through the row index and new items
+        are appended after the cached next empty row, so regardless of the
+        number of items this costs at most one batch update for changed
+        items and one append for new items. The batch update of changed
+        items is shared with other readmes written at the same time.
+
+        If the records have not been loaded (e.g. when replaying journaled
+        writes from an earlier run), the row index is built first.
+        """
+
+        # pylint: disable=import-outside-toplevel
+        from gspread.utils import absolute_range_name
+
+        # The snapshot no longer matches the worksheet
+        self.records_cache.invalidate(self.title)
+
+        if self.next_empty_row is None:
+            self.sync_sheet_rows()
+
+        batch = []
+        new_rows = []
+        for (section_type, data_type), value in items.items():
+            row = self.find_sheet_row(section_type, data_type)
+            if row:
+                batch.append({
+                    'range': absolute_range_name(self.title, f'C{row}'),
+                    'values': [[value]]
+                })
+            else:
+                new_rows.append([section_type, data_type, value])
+
+        if batch:
+            self.aggregator.update(batch)
+
+        if new_rows:
+            self.append_sheet_rows(new_rows)
+
+    def replace_records(self, records):
+        """
+        Rewrites the worksheet with the given records.
+
+        Every row is written by a single update, with rows left over from
+        the old records blanked in the same update, so a failed write
+        changes nothing. The worksheet is grown first if the records do
+        not fit, and only shrunk to fit them exactly once the write has
+        succeeded
+        """
+
+        self.records_cache.invalidate(self.title)
+
+        sheet_rows = [HEADER] + [
+            [record['Section Type'], record['Data Type'], record['Value']]
+            for record in records
+        ]
+
+        old_row_count = max(
+            self.worksheet.row_count,
+            len(self.worksheet.get_values('A:C'))
+        )
+
+        if len(sheet_rows) > old_row_count:
+            self.worksheet.resize(rows=len(sheet_rows))
+
+        blank_rows = [[''] * len(HEADER)] * (old_row_count - len(sheet_rows))
+
+        self.worksheet.update(
+            'A1',
+            sheet_rows + blank_rows,
+            value_input_option=VALUE_INPUT_OPTION
+        )
+
+        if blank_rows:
+            self.worksheet.resize(rows=len(sheet_rows))
+
+        self.index_sheet_values(sheet_rows)
+
+    def append_sheet_rows(self, new_rows):
+        """
+        Appends rows to the end of the worksheet, indexing each of them and
+        advancing the next empty row.
+
+        The sheet reports where the rows actually landed. If this is not
+        the expected next empty row, the worksheet was changed elsewhere,
+        so the row index and next empty row are re-synced from the sheet.
+
+            Parameters:
+                new_rows (list): Rows of [Section Type, Data Type, Value]
+        """
+        expected_row = self.find_next_empty_sheet_row()
+
+        response = self.worksheet.append_rows(
+            new_rows,
+            value_input_option=VALUE_INPUT_OPTION,
+            table_range='A1'
+        )
+
+        updated_range = response.get('updates', {}).get('updatedRange', '')
+        match = re.search(r'!A(\d+)', updated_range)
+        first_row = int(match.group(1)) if match else expected_row
+
+        if first_row != expected_row:
+            self.sync_sheet_rows()
+            return
+
+        for row_number, row in enumerate(new_rows, start=first_row):
+            self.index_sheet_row(row[0], row[1], row_number)
+
+        self.next_empty_row = first_row + len(new_rows)
+
+    def find_sheet_row(self, section_type, data_type):
+        """
+        Returns the worksheet row holding the given item, or None if the
+        item has not been written to the worksheet yet
+        """
+        return self.row_index.get((section_type, data_type))
+
+    def index_sheet_row(self, section_type, data_type, row):
+        """
+        Records the worksheet row holding the given item. If the item is
+        already indexed, the first row found for it is kept
+        """
+        self.row_index.setdefault((section_type, data_type), row)
+
+    def find_next_empty_sheet_row(self):
+        """
+        Returns the index of the next empty row for appending. The sheet
+        is only read if the next empty row has not been seeded yet
+        """
+
+        if self.next_empty_row is None:
+            self.sync_sheet_rows()
+
+        return self.next_empty_row
+
+    def sync_sheet_rows(self):
+        """
+        Rebuilds the row index and next empty row from the worksheet.
+        Used when a write shows the worksheet was changed elsewhere, or
+        items are written before the records have been loaded
+        """
+
+        self.index_sheet_values(self.worksheet.get_values('A:B'))
+
+    def index_sheet_values(self, sheet_rows):
+        """
+        Rebuilds the row index and next empty row from the values of the
+        worksheet, header row included
+
+            Parameters:
+                sheet_rows (list): Rows of worksheet values, starting with
+                the header row
+        """
+
+        self.row_index = {}
+        for row_number, row in enumerate(sheet_rows[1:], start=2):
+            row = row + [''] * (2 - len(row))
+            self.index_sheet_row(row[0], row[1], row_number)
+
+        self.next_empty_row = len(sheet_rows) + 1
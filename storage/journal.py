@@ -0,0 +1,214 @@
+"""
+This module contains the local write journal.
+
+Every readme change is appended to the journal on disk before it is sent
+to the storage backend, and only removed once the backend has accepted
+it. If the backend is slow or unreachable nothing is lost: the changes
+wait in the journal and are replayed when it can be reached again, even
+by a later run of the app.
+
+The journal is a JSON lines file shared by every process on the machine,
+guarded by a lock file so that appends and compaction never interleave.
+Each entry is tagged with the scope of the storage it belongs to (e.g.
+the spreadsheet), so sessions using different storage never replay each
+other's changes.
+
+A process killed while appending may leave a torn last line. Lines that
+cannot be decoded are skipped, and dropped at the next compaction.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+
+from .files import file_lock, write_atomically
+
+
+class WriteJournal:
+    """
+    A class to represent an append-only journal of readme item writes.
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        Path to the journal file
+    scope : str
+        Identifies the storage the journal's users write to, only entries
+        of this scope are read
+    """
+
+    def __init__(self, path, scope=None):
+        self.path = path
+        self.scope = scope
+
+    def locked(self):
+        """
+        Returns the journal lock, shared between threads and processes,
+        to hold in a with block
+        """
+        return file_lock(self.path + '.lock')
+
+    def title_lock(self, title):
+        """
+        Returns a lock on a readme's journaled writes, shared between
+        threads and processes, to hold in a with block. Held while syncing
+        a readme, so that two sessions never write the same journaled
+        items to the storage
+        """
+        digest = hashlib.sha1(f'{self.scope}/{title}'.encode('utf-8'))
+        return file_lock(f'{self.path}.{digest.hexdigest()[:16]}.lock')
+
+    def in_scope(self, entry):
+        """
+        Returns True if a journal entry belongs to the journal's scope
+        """
+        return entry.get('scope') == self.scope
+
+    def record(self, title, items):
+        """
+        Durably appends item writes for a readme to the journal
+
+            Parameters:
+                title (str): The title of the readme
+                items (dict): Maps (Section Type, Data Type) to the value
+                to store
+        """
+
+        lines = ""
+        for (section_type, data_type), value in items.items():
+            lines += json.dumps({
+                "id": uuid.uuid4().hex,
+                "scope": self.scope,
+                "readme": title,
+                "section_type": section_type,
+                "data_type": data_type,
+                "value": value
+            }) + '\n'
+
+        with self.locked(), open(self.path, 'ab+') as file:
+            # Start a new line after a torn last line
+            size = file.seek(0, os.SEEK_END)
+            if size:
+                file.seek(size - 1)
+                if file.read(1) != b'\n':
+                    lines = '\n' + lines
+
+            file.write(lines.encode('utf-8'))
+            file.flush()
+            os.fsync(file.fileno())
+
+    @staticmethod
+    def decode(line):
+        """
+        Returns the entry held by a journal line, or None if the line is
+        blank or cannot be decoded
+        """
+
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return None
+
+        if not isinstance(entry, dict) or 'id' not in entry:
+            return None
+
+        return entry
+
+    def read(self):
+        """
+        Returns every entry of the journal's scope, oldest first
+        """
+
+        if not os.path.exists(self.path):
+            return []
+
+        with self.locked(), open(
+                self.path, encoding='utf-8', errors='replace') as file:
+            entries = [self.decode(line) for line in file if line.strip()]
+
+        return [
+            entry for entry in entries
+            if entry is not None and self.in_scope(entry)
+        ]
+
+    def titles(self):
+        """
+        Returns the titles of all readmes with journaled writes
+        """
+        return list(dict.fromkeys(entry['readme'] for entry in self.read()))
+
+    def pending_items(self, title):
+        """
+        Returns the journaled writes for a readme, coalesced so that only
+        the latest value of each item is kept
+
+            Returns:
+                ids (list): The ids of the journal entries covered
+                items (dict): Maps (Section Type, Data Type) to the latest
+                value written
+        """
+
+        ids = []
+        items = {}
+        for entry in self.read():
+            if entry['readme'] == title:
+                ids.append(entry['id'])
+                items[(entry['section_type'], entry['data_type'])] = \
+                    entry['value']
+
+        return ids, items
+
+    def remove(self, ids):
+        """
+        Compacts the journal, removing the entries with the given ids once
+        they have been written to the storage backend
+        """
+
+        ids = set(ids)
+
+        with self.locked():
+            if not os.path.exists(self.path):
+                return
+
+            with open(self.path, encoding='utf-8', errors='replace') \
+                    as file:
+                lines = []
+                for line in file:
+                    entry = self.decode(line)
+                    if entry is not None and entry['id'] not in ids:
+                        lines.append(line.rstrip('\n') + '\n')
+
+            write_atomically(self.path, ''.join(lines))
+
+    def apply(self, title, records):
+        """
+        Applies the journaled writes for a readme on top of records loaded
+        from the storage backend, so changes that have not been synced yet
+        are not lost when a readme is loaded
+
+            Parameters:
+                title (str): The title of the readme
+                records (list): Records as returned by load_records
+
+            Returns:
+                records (list): The records with journaled writes applied
+        """
+
+        _, items = self.pending_items(title)
+
+        for record in records:
+            key = (record.get('Section Type'), record.get('Data Type'))
+            if key in items:
+                record['Value'] = items.pop(key)
+
+        for (section_type, data_type), value in items.items():
+            records.append({
+                'Section Type': section_type,
+                'Data Type': data_type,
+                'Value': value
+            })
+
+        return records
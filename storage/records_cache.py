@@ -0,0 +1,109 @@
+"""
+This module contains the on-disk cache of readme worksheet values.
+
+Loading a readme otherwise downloads its whole worksheet every time,
+even if nothing has changed since it was last loaded. Instead the values
+are kept on disk as a compact snapshot (marshal, compressed with zlib),
+tagged with the spreadsheet's Drive version. Drive bumps the version on
+every change to the spreadsheet, so a single cheap metadata call tells
+whether a snapshot can still be trusted.
+"""
+
+import hashlib
+import marshal
+import os
+import zlib
+
+from .files import write_atomically
+
+
+class RecordsCache:
+    """
+    A class to represent cached worksheet values for the readmes of one
+    spreadsheet.
+
+    ...
+
+    Attributes
+    ----------
+    directory : str
+        Directory holding a snapshot file per readme
+    spreadsheet : gspread Spreadsheet
+        The spreadsheet the readmes belong to
+    """
+
+    def __init__(self, directory, spreadsheet):
+        self.directory = directory
+        self.spreadsheet = spreadsheet
+
+    def revision(self):
+        """
+        Returns the current Drive version of the spreadsheet, which
+        changes whenever anything in it changes
+        """
+        # pylint: disable=import-outside-toplevel
+        from gspread.urls import DRIVE_FILES_API_V3_URL
+
+        response = self.spreadsheet.client.request(
+            'get',
+            f'{DRIVE_FILES_API_V3_URL}/{self.spreadsheet.id}',
+            params={'fields': 'version', 'supportsAllDrives': True}
+        )
+        return response.json()['version']
+
+    def snapshot_path(self, title):
+        """
+        Returns the path of the snapshot file of a readme
+        """
+
+        name = hashlib.sha1(
+            f'{self.spreadsheet.id}/{title}'.encode('utf-8')
+        ).hexdigest()
+        return os.path.join(self.directory, name)
+
+    def load(self, title, revision):
+        """
+        Returns the cached worksheet values of a readme if they were saved
+        at the given revision, or else None
+        """
+
+        try:
+            with open(self.snapshot_path(title), 'rb') as file:
+                saved_revision, rows = marshal.loads(
+                    zlib.decompress(file.read())
+                )
+        except (OSError, ValueError, EOFError, TypeError, zlib.error):
+            return None
+
+        if saved_revision != revision:
+            return None
+
+        return rows
+
+    def save(self, title, revision, rows):
+        """
+        Saves the worksheet values of a readme, read at the given
+        revision. Failing to save only means the next load reads the
+        worksheet again
+        """
+
+        try:
+            # Snapshots are read back with marshal, which is not safe
+            # against crafted files, so only the owner may write them
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            write_atomically(
+                self.snapshot_path(title),
+                zlib.compress(marshal.dumps((revision, rows)))
+            )
+        except OSError:
+            pass
+
+    def invalidate(self, title):
+        """
+        Removes the snapshot of a readme, e.g. once it has been written to
+        """
+
+        try:
+            os.remove(self.snapshot_path(title))
+        except OSError:
+            pass
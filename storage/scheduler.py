@@ -0,0 +1,228 @@
+"""
+This module contains the scheduler every Google Sheets API request made
+by the process goes through.
+
+Google enforces per-minute read and write quotas. Rather than sending
+requests as fast as they come and failing once over quota, requests wait
+for a token from a read or write token bucket refilled at the quota rate.
+Requests rejected anyway (429) or failed by the server (5xx) are retried
+with jittered exponential backoff, the latter only when repeating them
+cannot apply a change twice.
+
+Interactive requests, made while a user is waiting, take tokens ahead of
+background requests such as the write-behind queue's syncs.
+"""
+
+import os
+import random
+import threading
+import time
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# The default Sheets API quotas are 60 reads and 60 writes per minute per
+# user, and the service account is a single user
+READS_PER_MINUTE = float(
+    os.environ.get('README_GENERATOR_READS_PER_MINUTE', 60)
+)
+WRITES_PER_MINUTE = float(
+    os.environ.get('README_GENERATOR_WRITES_PER_MINUTE', 60)
+)
+MAX_RETRIES = int(os.environ.get('README_GENERATOR_MAX_RETRIES', 5))
+
+PRIORITY = threading.local()
+
+
+def get_priority():
+    """
+    Returns the priority of requests made by the current thread
+    """
+    return getattr(PRIORITY, 'value', INTERACTIVE)
+
+
+def set_priority(priority):
+    """
+    Sets the priority of requests made by the current thread, INTERACTIVE
+    (the default) or BACKGROUND
+    """
+    PRIORITY.value = priority
+
+
+def is_idempotent(method, url):
+    """
+    Returns True if repeating the request cannot apply a change twice, so
+    that it is safe to retry after a server error. Appends and
+    spreadsheet batch updates (e.g. adding a worksheet) are not
+    """
+
+    if method.upper() in ('GET', 'HEAD', 'PUT', 'DELETE'):
+        return True
+
+    # values:batchUpdate, values:batchGet and values:batchClear set,
+    # read or clear fixed ranges
+    return '/values:batch' in url
+
+
+class TokenBucket:
+    """
+    A class to represent a token bucket, holding up to capacity tokens and
+    refilled at rate tokens per second. While interactive callers are
+    waiting, background callers wait behind them.
+
+    ...
+
+    Attributes
+    ----------
+    rate : float
+        Tokens added per second
+    capacity : float
+        Most tokens held at once, i.e. the largest burst of requests
+    tokens : float
+        Tokens currently available
+    waiting : list
+        Number of callers waiting at each priority
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.waiting = [0, 0]
+        self.condition = threading.Condition()
+
+    def refill(self):
+        """
+        Adds the tokens accrued since the last refill
+        """
+
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def acquire(self, priority):
+        """
+        Waits until a token is available, and no caller of a higher
+        priority is waiting for one, then takes it
+        """
+
+        with self.condition:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    self.refill()
+                    ahead = sum(self.waiting[:priority])
+
+                    if self.tokens >= 1 and not ahead:
+                        self.tokens -= 1
+                        return
+
+                    self.condition.wait(
+                        max(0.01, (1 - self.tokens) / self.rate)
+                    )
+            finally:
+                self.waiting[priority] -= 1
+                self.condition.notify_all()
+
+    def drain(self):
+        """
+        Empties the bucket. Called when the API reports the quota as used
+        up, so every caller slows down rather than only the one rejected
+        """
+
+        with self.condition:
+            self.refill()
+            self.tokens = min(self.tokens, 0)
+
+
+class RequestScheduler:
+    """
+    A class to represent the scheduling of API requests within the quota.
+
+    ...
+
+    Attributes
+    ----------
+    reads : TokenBucket
+        Tokens for GET requests
+    writes : TokenBucket
+        Tokens for every other request
+    max_retries : int
+        Most times a failed request is retried
+    """
+
+    def __init__(self, reads_per_minute=READS_PER_MINUTE,
+                 writes_per_minute=WRITES_PER_MINUTE,
+                 max_retries=MAX_RETRIES):
+        # Allow bursts of up to 10 seconds' worth of requests
+        self.reads = TokenBucket(
+            reads_per_minute / 60,
+            max(1, reads_per_minute / 6)
+        )
+        self.writes = TokenBucket(
+            writes_per_minute / 60,
+            max(1, writes_per_minute / 6)
+        )
+        self.max_retries = max_retries
+
+    def request(self, method, url, send):
+        """
+        Sends a request once a token is available, retrying it if needed.
+
+            Parameters:
+                method (str): The HTTP method of the request
+                url (str): The URL of the request
+                send (function): Sends the request and returns the response
+
+            Returns:
+                response (requests.Response): The last response received
+        """
+
+        bucket = self.reads if method.upper() == 'GET' else self.writes
+        retry_server_errors = is_idempotent(method, url)
+        priority = get_priority()
+
+        attempt = 0
+        while True:
+            bucket.acquire(priority)
+
+            try:
+                response = send()
+            except OSError:
+                # Raised by requests for connection errors and timeouts
+                if not retry_server_errors or attempt >= self.max_retries:
+                    raise
+                response = None
+
+            if response is not None:
+                status = response.status_code
+                if status == 429:
+                    bucket.drain()
+                elif not (status >= 500 and retry_server_errors):
+                    return response
+
+                if attempt >= self.max_retries:
+                    return response
+
+            time.sleep(self.backoff(attempt, response))
+            attempt += 1
+
+    @staticmethod
+    def backoff(attempt, response):
+        """
+        Returns the seconds to wait before retrying: the server's
+        Retry-After if given, or else an exponentially growing, randomly
+        jittered delay
+        """
+
+        retry_after = response is not None and \
+            response.headers.get('Retry-After')
+
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+
+        return random.uniform(0, min(32, 2 ** attempt))
@@ -0,0 +1,246 @@
+"""
+This module contains the sharded Google Sheets storage backend.
+
+A spreadsheet has hard limits on its number of worksheets and cells, and
+its metadata gets slower to fetch as it grows. Sharded storage spreads
+readmes over several spreadsheets (shards), each used exactly like the
+single spreadsheet of GoogleSheetsStorage.
+
+A directory worksheet in the first (primary) spreadsheet maps each readme
+title to the spreadsheet holding it. Readmes created before sharding was
+enabled have no directory entry, and are found in the primary
+spreadsheet.
+"""
+
+import threading
+import time
+
+from .google_sheets import DIRECTORY_TITLE, WORKSHEETS_TTL, \
+    GoogleSheetsStorage
+from .storage import Storage
+
+DIRECTORY_HEADER = ['Readme', 'Spreadsheet']
+
+
+class ShardedGoogleSheetsStorage(Storage):
+    """
+    A class to represent readmes stored across several Google
+    spreadsheets.
+
+    ...
+
+    Attributes
+    ----------
+    shards : dict
+        A GoogleSheetsStorage for each spreadsheet, keyed by name, in the
+        configured order
+    primary : GoogleSheetsStorage
+        The first spreadsheet, holding the directory worksheet
+    directory : dict
+        Cached map of readme title to spreadsheet name, trusted for
+        WORKSHEETS_TTL seconds
+    """
+
+    def __init__(self, spreadsheet_names, creds_file='creds.json'):
+        self.shards = {
+            name: GoogleSheetsStorage(creds_file, name)
+            for name in spreadsheet_names
+        }
+        self.primary = self.shards[spreadsheet_names[0]]
+
+        self.directory = None
+        self.directory_fetched_at = 0
+        self.directory_lock = threading.Lock()
+
+    def get_directory_worksheet(self):
+        """
+        Returns the directory worksheet, creating it in the primary
+        spreadsheet if it does not exist yet
+        """
+        # pylint: disable=import-outside-toplevel
+        from gspread.exceptions import APIError
+
+        worksheet = self.primary.get_worksheets().get(DIRECTORY_TITLE)
+        if worksheet is not None:
+            return worksheet
+
+        try:
+            worksheet = self.primary.get_spreadsheet().add_worksheet(
+                DIRECTORY_TITLE,
+                rows=1,
+                cols=len(DIRECTORY_HEADER)
+            )
+            worksheet.update('A1', [DIRECTORY_HEADER])
+        except APIError as err:
+            # Another session may have just created it
+            if 'already exists' not in str(err):
+                raise
+
+        self.primary.invalidate_worksheets()
+        return self.primary.get_worksheets()[DIRECTORY_TITLE]
+
+    def get_directory(self, refresh=False):
+        """
+        Returns the map of readme title to spreadsheet name, reading the
+        directory worksheet if the cache is empty, has expired or a
+        refresh is asked for
+        """
+
+        with self.directory_lock:
+            expired = time.monotonic() - self.directory_fetched_at > \
+                WORKSHEETS_TTL
+
+            if self.directory is None or expired or refresh:
+                rows = self.get_directory_worksheet().get_values('A:B')
+                self.directory = {
+                    row[0]: row[1]
+                    for row in rows[1:]
+                    if len(row) == 2 and row[1] in self.shards
+                }
+                self.directory_fetched_at = time.monotonic()
+
+            return self.directory
+
+    def prefetch(self):
+        """
+        Warms up the primary spreadsheet and reads the directory
+        """
+        self.get_directory()
+
+    def after_fork(self):
+        """
+        Gives every shard its own connections in the forked child
+        """
+        for shard in self.shards.values():
+            shard.after_fork()
+
+        self.directory_lock = threading.Lock()
+
+    def scope(self):
+        """
+        Returns the scope of the primary spreadsheet, which the directory
+        belongs to
+        """
+        return self.primary.scope()
+
+    def list_readmes(self):
+        """
+        Returns the titles of all readmes: those in the directory, then
+        those in the primary spreadsheet from before sharding
+        """
+
+        directory = self.get_directory()
+        unsharded = [
+            title for title in self.primary.list_readmes()
+            if title not in directory
+        ]
+
+        return list(directory) + unsharded
+
+    def choose_shard(self):
+        """
+        Returns the name of the spreadsheet holding the fewest readmes,
+        preferring earlier spreadsheets on a tie
+        """
+
+        directory = self.get_directory()
+        counts = {name: 0 for name in self.shards}
+
+        for shard_name in directory.values():
+            counts[shard_name] += 1
+
+        counts[self.primary.spreadsheet_name] += len([
+            title for title in self.primary.list_readmes()
+            if title not in directory
+        ])
+
+        return min(counts, key=counts.get)
+
+    def remove_directory_entry(self, title, shard_name):
+        """
+        Deletes the directory row mapping title to shard_name. The row is
+        looked up again, as rows may have moved since it was added
+        """
+
+        worksheet = self.get_directory_worksheet()
+        rows = worksheet.get_values('A:B')
+
+        for row_number in range(len(rows), 1, -1):
+            if rows[row_number - 1][:2] == [title, shard_name]:
+                worksheet.delete_rows(row_number)
+                return
+
+    def create_readme(self, title):
+        """
+        Creates a new readme in the spreadsheet holding the fewest
+        readmes, and records it in the directory.
+
+        The directory row is added before the worksheet is created, and
+        removed again if creating the worksheet fails, so a readme can
+        never be left in a spreadsheet the directory does not route to
+        """
+
+        directory = self.get_directory(refresh=True)
+
+        if title in directory or title in self.primary.list_readmes():
+            raise Exception(
+                'A worksheet with this name already exists! Please try again'
+            )
+
+        shard_name = self.choose_shard()
+
+        self.get_directory_worksheet().append_row(
+            [title, shard_name],
+            value_input_option='RAW',
+            table_range='A1'
+        )
+
+        try:
+            store = self.shards[shard_name].create_readme(title)
+        except Exception:
+            self.remove_directory_entry(title, shard_name)
+            raise
+
+        with self.directory_lock:
+            if self.directory is not None:
+                self.directory[title] = shard_name
+
+        return store
+
+    def open_readme(self, title):
+        """
+        Returns the ReadmeStore of an existing readme from the spreadsheet
+        the directory routes it to. A readme missing from the directory
+        may have been created by another process since it was read, so
+        the directory is read again once before falling back to the
+        primary spreadsheet
+        """
+
+        shard_name = self.get_directory().get(title)
+
+        if shard_name is None:
+            shard_name = self.get_directory(refresh=True).get(
+                title,
+                self.primary.spreadsheet_name
+            )
+
+        return self.shards[shard_name].open_readme(title)
+
+    def load_readmes(self, titles):
+        """
+        Returns the records of several readmes, keyed by title, reading
+        the readmes of each spreadsheet together in batched requests
+        """
+
+        directory = self.get_directory()
+        titles_by_shard = {}
+
+        for title in titles:
+            shard_name = directory.get(title, self.primary.spreadsheet_name)
+            titles_by_shard.setdefault(shard_name, []).append(title)
+
+        records = {}
+        for shard_name, shard_titles in titles_by_shard.items():
+            records.update(self.shards[shard_name].load_readmes(shard_titles))
+
+        return {title: records[title] for title in titles}
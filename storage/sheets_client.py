@@ -0,0 +1,191 @@
+"""
+This module holds the process-wide gspread clients used by the Google
+Sheets storage backend.
+
+Every GoogleSheetsStorage in a process (e.g. one per session in server
+mode) shares one authorized client per credentials file, and one handle
+per spreadsheet. The client's HTTP session keeps a bounded pool of
+keep-alive connections, so TLS handshakes are paid once per connection
+rather than once per request, and asks for gzip compressed responses.
+
+This module imports gspread and google-auth, which are slow to import,
+so it is itself only imported the first time a spreadsheet is needed.
+"""
+
+import os
+import threading
+
+import gspread
+import requests
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2.service_account import Credentials
+
+from .aggregator import WriteAggregator
+from .scheduler import RequestScheduler
+from .token_cache import TokenCache
+
+SCOPE = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive.file",
+    "https://www.googleapis.com/auth/drive"
+    ]
+
+# Most connections kept open to the Google APIs. Requests beyond this many
+# at once wait for a pooled connection rather than opening a new one
+POOL_SIZE = int(os.environ.get('README_GENERATOR_HTTP_POOL_SIZE', 10))
+
+# Google APIs only compress responses for clients whose User-Agent
+# contains 'gzip'
+USER_AGENT = 'readme-generator (gzip)'
+
+CLIENTS = {}
+SPREADSHEETS = {}
+AGGREGATORS = {}
+LOCK = threading.Lock()
+
+# Every request made by the shared clients is scheduled within the quota
+SCHEDULER = RequestScheduler()
+
+# Access tokens are shared with other processes through a file on disk
+TOKEN_CACHE = TokenCache(
+    os.environ.get(
+        'README_GENERATOR_TOKEN_CACHE',
+        '.readme_generator_token.json'
+    )
+)
+
+# The process the shared clients' connections were opened in
+OWNER_PID = os.getpid()
+
+
+class PooledSession(AuthorizedSession):
+    """
+    A class to represent the HTTP session of a shared client.
+
+    Connections are pooled and kept alive, and responses are gzip
+    compressed. The session may be used by many threads at once, so the
+    access token is refreshed by one thread at a time, and is taken from
+    the on-disk token cache when another process has already fetched one.
+    Every request is sent through the process-wide scheduler.
+
+    ...
+
+    Attributes
+    ----------
+    refresh_lock : threading.Lock
+        Held while the access token is being refreshed
+    """
+
+    def __init__(self, credentials):
+        super().__init__(credentials)
+        self.refresh_lock = threading.Lock()
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=POOL_SIZE,
+            pool_block=True
+        )
+        self.mount('https://', adapter)
+
+        self.headers['Accept-Encoding'] = 'gzip'
+        self.headers['Connection'] = 'keep-alive'
+        self.headers['User-Agent'] = USER_AGENT
+
+    def request(self, method, url, data=None, headers=None, **kwargs):
+        """
+        Makes an authorized request once the scheduler allows it, first
+        refreshing an expired access token. Without the lock every thread
+        finding the token expired would refresh it
+        """
+
+        def send():
+            with self.refresh_lock:
+                if not self.credentials.valid:
+                    TOKEN_CACHE.refresh(self.credentials, self._auth_request)
+
+            return super(PooledSession, self).request(
+                method, url, data=data, headers=headers, **kwargs
+            )
+
+        return SCHEDULER.request(method, url, send)
+
+
+def get_client(creds_file):
+    """
+    Returns the process-wide client authorized with the given service
+    account credentials, authorizing it on first use
+    """
+
+    with LOCK:
+        return get_client_locked(creds_file)
+
+
+def get_client_locked(creds_file):
+    """
+    Does the work of get_client() while the lock is held
+    """
+
+    client = CLIENTS.get(creds_file)
+
+    if client is None:
+        creds = Credentials.from_service_account_file(creds_file)
+        scoped_creds = creds.with_scopes(SCOPE)
+        client = gspread.Client(
+            auth=scoped_creds,
+            session=PooledSession(scoped_creds)
+        )
+        CLIENTS[creds_file] = client
+
+    return client
+
+
+def open_spreadsheet(creds_file, spreadsheet_name):
+    """
+    Returns the process-wide handle of the named spreadsheet, opening it
+    with the shared client on first use
+    """
+
+    with LOCK:
+        spreadsheet = SPREADSHEETS.get((creds_file, spreadsheet_name))
+
+        if spreadsheet is None:
+            client = get_client_locked(creds_file)
+            spreadsheet = client.open(spreadsheet_name)
+            SPREADSHEETS[(creds_file, spreadsheet_name)] = spreadsheet
+
+        return spreadsheet
+
+
+def get_write_aggregator(creds_file, spreadsheet_name):
+    """
+    Returns the process-wide write aggregator of the named spreadsheet
+    """
+
+    spreadsheet = open_spreadsheet(creds_file, spreadsheet_name)
+
+    with LOCK:
+        return AGGREGATORS.setdefault(
+            (creds_file, spreadsheet_name),
+            WriteAggregator(spreadsheet)
+        )
+
+
+def after_fork():
+    """
+    Gives every shared client a new HTTP session when first called in a
+    forked child, so the child never uses connections pooled by its parent.
+    Further calls in the same process do nothing
+    """
+
+    global OWNER_PID, LOCK, SCHEDULER  # pylint: disable=global-statement
+
+    if OWNER_PID == os.getpid():
+        return
+
+    OWNER_PID = os.getpid()
+    LOCK = threading.Lock()
+    SCHEDULER = RequestScheduler()
+    AGGREGATORS.clear()
+
+    for client in CLIENTS.values():
+        client.session = PooledSession(client.auth)
@@ -0,0 +1,162 @@
+"""
+This module contains the local snapshots of session state.
+
+Reloading the browser tab ends the session, and with it the readme the
+user was editing. The browser keeps a random resume token for the tab,
+and the session saves a snapshot of where the user is (the open readme
+and its records) under that token after every change. A session started
+with the same token picks up from the snapshot, without reading the
+readme from the storage again.
+
+Each snapshot is a small JSON file, readable only by its owner, written
+under a temporary name and then moved into place so that a snapshot is
+never seen half written.
+
+Snapshots expire: one older than the maximum age is never resumed, as the
+readme may have been changed elsewhere since. Expired snapshots, e.g. of
+tabs that were simply closed, are deleted when sessions save theirs.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+
+from .files import write_atomically
+
+# Tokens are generated by the browser, anything else is ignored
+TOKEN_PATTERN = re.compile(r'[A-Za-z0-9_-]{16,64}')
+
+# Seconds after its last save that a snapshot expires
+MAX_AGE = float(os.environ.get('README_GENERATOR_SESSION_MAX_AGE', 3600))
+
+# Least number of seconds between two prunes of expired snapshots
+PRUNE_INTERVAL = 600
+
+
+def valid_token(token):
+    """
+    Returns True if token can be used as a resume token
+    """
+    return bool(token) and TOKEN_PATTERN.fullmatch(token) is not None
+
+
+class SessionSnapshots:
+    """
+    A class to represent a directory of session snapshots, one per resume
+    token.
+
+    ...
+
+    Attributes
+    ----------
+    directory : str
+        Directory holding a snapshot file per resume token
+    max_age : float
+        Seconds after its last save that a snapshot expires
+    """
+
+    def __init__(self, directory, max_age=MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+        self.pruned_at = None
+
+    def snapshot_path(self, token):
+        """
+        Returns the path of the snapshot file for a resume token
+        """
+
+        name = hashlib.sha1(token.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + '.json')
+
+    def expired(self, path):
+        """
+        Returns True if the file at path was last written longer than
+        max_age seconds ago
+        """
+        return time.time() - os.path.getmtime(path) > self.max_age
+
+    def load(self, token):
+        """
+        Returns the snapshot saved for a resume token, or None if there is
+        none, it has expired or it cannot be read. An expired snapshot is
+        deleted
+        """
+
+        if not valid_token(token):
+            return None
+
+        path = self.snapshot_path(token)
+
+        try:
+            if self.expired(path):
+                self.discard(token)
+                return None
+
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def prune(self):
+        """
+        Deletes expired snapshots, and temporary files left by saves that
+        never finished, at most once every PRUNE_INTERVAL seconds
+        """
+
+        now = time.monotonic()
+        if self.pruned_at is not None and \
+                now - self.pruned_at < PRUNE_INTERVAL:
+            return
+
+        self.pruned_at = now
+
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if self.expired(path):
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def save(self, token, snapshot):
+        """
+        Replaces the snapshot for a resume token. Failing to save only
+        means a reconnecting session starts from the main menu
+
+            Parameters:
+                token (str): The resume token
+                snapshot (dict): The session state, as JSON compatible
+                values
+        """
+
+        if not valid_token(token):
+            return
+
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            write_atomically(self.snapshot_path(token), json.dumps(snapshot))
+        except OSError:
+            pass
+
+        self.prune()
+
+    def discard(self, token):
+        """
+        Removes the snapshot for a resume token, e.g. once the user has
+        exited
+        """
+
+        if not valid_token(token):
+            return
+
+        try:
+            os.remove(self.snapshot_path(token))
+        except OSError:
+            pass
@@ -0,0 +1,190 @@
+"""
+This module contains the SQLite storage backend.
+
+All readmes are kept in a single local database file, which makes it
+possible to generate readmes at disk speed rather than at Sheets API
+speed. Records live in one table, indexed on (readme, section type,
+data type) so that writing an item is a single indexed upsert.
+"""
+
+import os
+import sqlite3
+import threading
+
+from .storage import Storage, ReadmeStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readmes (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS readme_items (
+    id INTEGER PRIMARY KEY,
+    readme TEXT NOT NULL,
+    section_type TEXT NOT NULL,
+    data_type TEXT NOT NULL,
+    value TEXT NOT NULL,
+    UNIQUE (readme, section_type, data_type)
+);
+"""
+
+
+class SQLiteStorage(Storage):
+    """
+    A class to represent readmes stored in a local SQLite database.
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        Path to the database file
+    connection : sqlite3.Connection
+        The connection to the database file
+    lock : threading.Lock
+        Serialises use of the connection between threads
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+
+        with self.lock, self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.executescript(SCHEMA)
+
+    def after_fork(self):
+        """
+        Opens a connection of the forked child's own, as SQLite
+        connections must not be carried across a fork
+        """
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.lock = threading.Lock()
+
+    def scope(self):
+        """
+        Returns the database file, as its readmes are kept apart from any
+        other storage
+        """
+        return f'sqlite:{os.path.abspath(self.path)}'
+
+    def list_readmes(self):
+        """
+        Returns the titles of all readmes in the order they were created
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT title FROM readmes ORDER BY id'
+            ).fetchall()
+
+        return [row[0] for row in rows]
+
+    def create_readme(self, title):
+        """
+        Creates a new readme and returns its ReadmeStore
+        """
+        try:
+            with self.lock, self.connection:
+                self.connection.execute(
+                    'INSERT INTO readmes (title) VALUES (?)', (title,)
+                )
+        except sqlite3.IntegrityError as err:
+            raise Exception(
+                'A readme with this name already exists! Please try again'
+            ) from err
+
+        return SQLiteReadmeStore(self, title)
+
+    def open_readme(self, title):
+        """
+        Returns the ReadmeStore of an existing readme
+        """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT 1 FROM readmes WHERE title = ?', (title,)
+            ).fetchone()
+
+        if not row:
+            raise Exception(f"No readme found with the name: {title}")
+
+        return SQLiteReadmeStore(self, title)
+
+
+class SQLiteReadmeStore(ReadmeStore):
+    """
+    A class to represent a readme stored in the SQLite database.
+
+    ...
+
+    Attributes
+    ----------
+    storage : SQLiteStorage
+        The storage object owning the database connection
+    title : str
+        The title of the readme
+    """
+
+    def __init__(self, storage, title):
+        self.storage = storage
+        self.title = title
+
+    def load_records(self):
+        """
+        Returns all records of the readme in the order they were written
+        """
+        with self.storage.lock:
+            rows = self.storage.connection.execute(
+                'SELECT section_type, data_type, value FROM readme_items '
+                'WHERE readme = ? ORDER BY id',
+                (self.title,)
+            ).fetchall()
+
+        return [
+            {'Section Type': row[0], 'Data Type': row[1], 'Value': row[2]}
+            for row in rows
+        ]
+
+    def write_items(self, items):
+        """
+        Upserts all items in a single database transaction
+        """
+        with self.storage.lock, self.storage.connection:
+            self.storage.connection.executemany(
+                'INSERT INTO readme_items '
+                '(readme, section_type, data_type, value) '
+                'VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (readme, section_type, data_type) '
+                'DO UPDATE SET value = excluded.value',
+                [
+                    (self.title, section_type, data_type, value)
+                    for (section_type, data_type), value in items.items()
+                ]
+            )
+
+    def replace_records(self, records):
+        """
+        Deletes the readme's records and inserts the given ones in a
+        single database transaction
+        """
+        with self.storage.lock, self.storage.connection:
+            self.storage.connection.execute(
+                'DELETE FROM readme_items WHERE readme = ?',
+                (self.title,)
+            )
+            self.storage.connection.executemany(
+                'INSERT INTO readme_items '
+                '(readme, section_type, data_type, value) '
+                'VALUES (?, ?, ?, ?)',
+                [
+                    (
+                        self.title,
+                        record['Section Type'],
+                        record['Data Type'],
+                        record['Value']
+                    )
+                    for record in records
+                ]
+            )
@@ -0,0 +1,160 @@
+"""
+This module contains the storage interface that the session, readmes and
+sections use to persist readme data.
+
+A Storage object represents the place all readmes are kept (e.g. the
+readme_generator spreadsheet), and hands out a ReadmeStore for each
+individual readme (e.g. a worksheet within that spreadsheet).
+"""
+
+
+class Storage:
+    """
+    A class to represent a collection of stored readmes.
+
+    ...
+
+    Methods
+    -------
+    list_readmes()
+        Returns the titles of all stored readmes
+
+    create_readme(title)
+        Creates an empty readme and returns its ReadmeStore
+
+    open_readme(title)
+        Returns the ReadmeStore of an existing readme
+
+    load_readmes(titles)
+        Returns the records of several readmes at once
+
+    scope()
+        Returns a name identifying where the readmes are kept
+
+    prefetch()
+        Warms up the storage so that the first listing is instant
+
+    after_fork()
+        Makes the storage safe to use in a newly forked child process
+    """
+
+    def prefetch(self):
+        """
+        Does any slow set up work (connecting, authenticating, fetching the
+        list of readmes) ahead of time. Called on a background thread while
+        the start animation plays. Backends that need no set up do nothing
+        """
+
+    def after_fork(self):
+        """
+        Called in a child process forked from a process that had already
+        used the storage. Connections inherited from the parent must not
+        be shared with it, so backends holding any open them afresh here.
+        Backends holding no connections do nothing
+        """
+
+    def scope(self):
+        """
+        Returns a name identifying where the readmes are kept (e.g. the
+        spreadsheet), used to keep apart the journaled changes of sessions
+        using different storage
+        """
+        raise NotImplementedError
+
+    def list_readmes(self):
+        """
+        Returns the titles of all stored readmes
+        """
+        raise NotImplementedError
+
+    def create_readme(self, title):
+        """
+        Creates an empty readme and returns its ReadmeStore.
+
+        Raises an Exception if a readme with this title already exists
+        """
+        raise NotImplementedError
+
+    def open_readme(self, title):
+        """
+        Returns the ReadmeStore of an existing readme
+        """
+        raise NotImplementedError
+
+    def load_readmes(self, titles):
+        """
+        Returns the records of several existing readmes, for bulk work
+        such as exporting every readme. Backends able to read many readmes
+        in one request override this to do so
+
+            Parameters:
+                titles (list): The titles of the readmes
+
+            Returns:
+                records (dict): Each readme's records, as returned by
+                load_records, keyed by title
+        """
+        return {
+            title: self.open_readme(title).load_records()
+            for title in titles
+        }
+
+
+class ReadmeStore:
+    """
+    A class to represent the stored data of a single readme.
+
+    Readme data is a list of records, each with a 'Section Type',
+    'Data Type' and 'Value'. A record is identified by its Section Type
+    and Data Type.
+
+    ...
+
+    Attributes
+    ----------
+    title : str
+        The title of the readme
+
+    Methods
+    -------
+    load_records()
+        Returns all records of the readme
+
+    write_items(items)
+        Writes the given items, overwriting existing records and adding
+        records for new items
+
+    replace_records(records)
+        Replaces all records of the readme
+    """
+
+    def load_records(self):
+        """
+        Returns all records of the readme as a list of dictionaries with
+        'Section Type', 'Data Type' and 'Value' keys, in the order the
+        records were first written
+        """
+        raise NotImplementedError
+
+    def write_items(self, items):
+        """
+        Writes the given items to the readme. Existing records are
+        overwritten, records are added for new items.
+
+            Parameters:
+                items (dict): Maps (Section Type, Data Type) to the value
+                to store
+        """
+        raise NotImplementedError
+
+    def replace_records(self, records):
+        """
+        Replaces all records of the readme with the given records, in the
+        given order. Used by bulk maintenance such as schema migrations,
+        not while the readme is being edited
+
+            Parameters:
+                records (list): Dictionaries with 'Section Type',
+                'Data Type' and 'Value' keys
+        """
+        raise NotImplementedError
@@ -0,0 +1,106 @@
+"""
+This module contains the on-disk cache of OAuth access tokens.
+
+Without it every 'python3 run.py' fetches a new access token from Google
+before its first Sheets request. Access tokens last an hour, so instead
+the token is saved to a file shared by every process on the machine, and
+a process only fetches a new one when the saved token is close to
+expiring.
+
+The file holds live credentials, so it is only readable by its owner, and
+is guarded by a lock file so that only one process refreshes at a time.
+"""
+
+import datetime
+import json
+
+from .files import file_lock, write_atomically
+
+# Saved tokens expiring sooner than this are refreshed rather than used
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+
+class TokenCache:
+    """
+    A class to represent a file of access tokens, keyed by service account
+    and scopes.
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        Path to the token file
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def locked(self):
+        """
+        Returns the token cache lock, shared between threads and
+        processes, to hold in a with block
+        """
+        return file_lock(self.path + '.lock')
+
+    def read(self):
+        """
+        Returns every saved token, an empty dictionary if there are none
+        or the file cannot be read
+        """
+
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def write(self, tokens):
+        """
+        Replaces the saved tokens, atomically and readable by their owner
+        only
+        """
+        write_atomically(self.path, json.dumps(tokens))
+
+    def refresh(self, credentials, request):
+        """
+        Makes expired credentials valid again, with the saved token if it
+        is not about to expire, or else by fetching a new token and saving
+        it for other processes
+
+            Parameters:
+                credentials (google.oauth2.service_account.Credentials):
+                The credentials to refresh
+                request (google.auth.transport.Request): Used to fetch a
+                new token
+        """
+
+        key = ' '.join(
+            [credentials.service_account_email] +
+            sorted(credentials.scopes or [])
+        )
+
+        with self.locked():
+            tokens = self.read()
+            saved = tokens.get(key)
+
+            if saved:
+                expiry = datetime.datetime.fromisoformat(saved['expiry'])
+                if expiry - datetime.datetime.utcnow() > REFRESH_MARGIN:
+                    credentials.token = saved['token']
+                    credentials.expiry = expiry
+                    return
+
+            credentials.refresh(request)
+
+            tokens[key] = {
+                'token': credentials.token,
+                'expiry': credentials.expiry.isoformat()
+            }
+
+            try:
+                self.write(tokens)
+            except OSError:
+                # Not being able to save the token only costs other
+                # processes a refresh of their own
+                pass
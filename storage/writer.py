@@ -0,0 +1,255 @@
+"""
+This module contains the write-behind queue used to persist readme
+changes on a background thread, so the menus never wait on the storage
+backend after an answer is given.
+
+Changes are journaled locally before they are queued. If the storage
+backend cannot be reached the changes stay in the journal, the app keeps
+working offline, and they are replayed, coalesced into one batch per
+readme, once the backend can be reached again.
+"""
+
+import queue
+import threading
+
+from . import scheduler
+
+# Queued in place of a readme title to stop the writer thread
+CLOSE = object()
+
+
+class WriteBehindQueue:
+    """
+    A class to represent a queue of readmes with changes to sync, worked
+    through by a single background thread.
+
+    Each sync writes everything journaled for a readme as one batch, in
+    journal order with later writes to an item replacing earlier ones, so
+    a replayed value can never overwrite a newer one.
+
+    ...
+
+    Attributes
+    ----------
+    storage : Storage
+        Used to open stores for readmes with journaled changes from an
+        earlier run
+    journal : WriteJournal
+        Local journal holding every change until it has been synced
+    queue : queue.Queue
+        Bounded queue of readme titles waiting to be synced
+    stores : dict
+        The ReadmeStore to sync each readme title to
+    failed : dict
+        Number of unsynced items for each readme whose last sync failed
+    last_error : Exception
+        The error raised by the most recent failed sync
+    retry_interval : float
+        Seconds between attempts to replay failed syncs
+    """
+
+    def __init__(self, storage, journal, maxsize=64, retry_interval=30):
+        self.storage = storage
+        self.journal = journal
+        self.queue = queue.Queue(maxsize)
+        self.stores = {}
+        self.failed = {}
+        self.last_error = None
+        self.retry_interval = retry_interval
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        """
+        Starts the writer thread, if not already running
+        """
+
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def submit(self, title, items, store=None):
+        """
+        Journals items for a readme and queues the readme to be synced.
+        Only blocks if the queue is full, i.e. the storage has fallen far
+        behind. The items are journaled before any store is needed, so
+        they are kept even if the storage cannot be reached
+
+            Parameters:
+                title (str): The title of the readme
+                items (dict): Maps (Section Type, Data Type) to the value
+                to store
+                store (ReadmeStore): The store to write the items to, or
+                None to open it from the storage when syncing
+        """
+
+        self.journal.record(title, items)
+
+        if store is not None:
+            with self.lock:
+                self.stores[title] = store
+
+        self.start()
+        self.queue.put(title)
+
+    def close(self):
+        """
+        Stops the writer thread once everything queued before has been
+        attempted, e.g. when a session hosted by a long-lived server ends.
+        Anything still unsynced stays in the journal
+        """
+
+        with self.lock:
+            thread = self.thread
+
+        if thread is None:
+            return
+
+        self.queue.put(CLOSE)
+        thread.join()
+
+        with self.lock:
+            self.thread = None
+            self.stores = {}
+
+    def resume(self):
+        """
+        Queues every readme with changes left in the journal, e.g. by an
+        earlier run that was offline, to be replayed
+        """
+
+        titles = self.journal.titles()
+        if titles:
+            self.start()
+
+        for title in titles:
+            self.queue.put(title)
+
+    def run(self):
+        """
+        Worker loop, syncing each queued readme in turn. While any sync
+        has failed, the failed readmes are retried every retry_interval
+        seconds rather than each time a change is queued
+        """
+
+        # Nobody is waiting on the syncs, so interactive API requests are
+        # scheduled ahead of them
+        scheduler.set_priority(scheduler.BACKGROUND)
+
+        while True:
+            with self.lock:
+                timeout = self.retry_interval if self.failed else None
+
+            try:
+                title = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                with self.lock:
+                    failed_titles = list(self.failed)
+
+                for failed_title in failed_titles:
+                    self.sync(failed_title)
+                continue
+
+            if title is CLOSE:
+                self.queue.task_done()
+                return
+
+            # While a readme is offline its changes just build up in the
+            # journal, they are replayed together by the retry above
+            with self.lock:
+                offline = title in self.failed
+
+            try:
+                if not offline:
+                    self.sync(title)
+            finally:
+                self.queue.task_done()
+
+    def sync(self, title):
+        """
+        Writes everything journaled for a readme to its store as one
+        batch, then removes it from the journal. On failure the changes
+        are left in the journal to be replayed later
+        """
+
+        # Syncs may be started by both the writer thread and flush(), but
+        # only one may write to a store at a time. The journal is shared
+        # with other sessions, which may be syncing the same readme, so
+        # the readme's journal lock is held as well
+        with self.sync_lock, self.journal.title_lock(title):
+            self.sync_items(title)
+
+    def sync_items(self, title):
+        """
+        Does the work of sync() while the sync locks are held. The pending
+        items are read only once the locks are held, so items synced by
+        another session meanwhile are not written again
+        """
+
+        ids, items = self.journal.pending_items(title)
+
+        if not items:
+            with self.lock:
+                self.failed.pop(title, None)
+            return
+
+        try:
+            with self.lock:
+                store = self.stores.get(title)
+
+            if store is None:
+                store = self.storage.open_readme(title)
+                with self.lock:
+                    self.stores.setdefault(title, store)
+
+            store.write_items(items)
+        except Exception as err:  # pylint: disable=broad-except
+            with self.lock:
+                self.failed[title] = len(items)
+                self.last_error = err
+            return
+
+        self.journal.remove(ids)
+
+        with self.lock:
+            self.failed.pop(title, None)
+
+    def flush(self):
+        """
+        Waits until every queued sync has been attempted, retrying failed
+        syncs once more.
+
+            Returns:
+                saved (bool): True if everything has been synced
+        """
+
+        self.queue.join()
+
+        with self.lock:
+            failed_titles = list(self.failed)
+
+        for title in failed_titles:
+            self.sync(title)
+
+        with self.lock:
+            return not self.failed
+
+    def status(self):
+        """
+        Returns a short description of pending or unsynced changes, or an
+        empty string if everything has been saved
+        """
+
+        with self.lock:
+            failed_count = sum(self.failed.values())
+
+        if failed_count:
+            return f"Offline: {failed_count} change(s) saved locally, " + \
+                "will sync when reconnected"
+
+        if self.queue.unfinished_tasks:
+            return "Saving changes..."
+
+        return ""
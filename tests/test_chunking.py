@@ -0,0 +1,169 @@
+"""
+Tests splitting long values across records and joining them back.
+
+The chunk size is patched down to a few characters, so values of a few
+chunks stay readable.
+"""
+
+import unittest
+from unittest import mock
+
+import chunking
+
+
+def records_list(records):
+    """
+    Converts the records returned by split_items into a list of records,
+    as they are loaded back from the storage
+    """
+
+    return [
+        {'Section Type': section_type, 'Data Type': data_type, 'Value': value}
+        for (section_type, data_type), value in records.items()
+    ]
+
+
+@mock.patch.object(chunking, 'CHUNK_SIZE', 4)
+class ChunkingTest(unittest.TestCase):
+    """
+    Tests the chunking module
+    """
+
+    def test_split_value(self):
+        """
+        A value is split into chunks of at most CHUNK_SIZE characters,
+        and an empty value is stored as one empty chunk
+        """
+        self.assertEqual(chunking.split_value('abcdefghij'),
+                         ['abcd', 'efgh', 'ij'])
+        self.assertEqual(chunking.split_value('abcd'), ['abcd'])
+        self.assertEqual(chunking.split_value(''), [''])
+
+    def test_split_items_adds_continuation_records(self):
+        """
+        A long value is stored as its first chunk under its own Data Type,
+        followed by numbered continuation records
+        """
+        chunk_counts = {}
+        records = chunking.split_items(
+            {('Introduction', 'description'): 'abcdefghij'},
+            chunk_counts
+        )
+
+        self.assertEqual(records, {
+            ('Introduction', 'description'): 'abcd',
+            ('Introduction', 'description#2'): 'efgh',
+            ('Introduction', 'description#3'): 'ij'
+        })
+        self.assertEqual(chunk_counts,
+                         {('Introduction', 'description'): 3})
+
+    def test_shrinking_a_value_empties_stale_continuations(self):
+        """
+        Continuation records left over from a longer earlier value are
+        written as empty values, and the chunk count is updated
+        """
+        chunk_counts = {('Introduction', 'description'): 3}
+        records = chunking.split_items(
+            {('Introduction', 'description'): 'abcde'},
+            chunk_counts
+        )
+
+        self.assertEqual(records, {
+            ('Introduction', 'description'): 'abcd',
+            ('Introduction', 'description#2'): 'e',
+            ('Introduction', 'description#3'): ''
+        })
+        self.assertEqual(chunk_counts,
+                         {('Introduction', 'description'): 2})
+
+    def test_emptying_a_value_empties_every_continuation(self):
+        """
+        Emptying a long value empties all of its continuation records
+        """
+        chunk_counts = {('Introduction', 'description'): 3}
+        records = chunking.split_items(
+            {('Introduction', 'description'): ''},
+            chunk_counts
+        )
+
+        self.assertEqual(records, {
+            ('Introduction', 'description'): '',
+            ('Introduction', 'description#2'): '',
+            ('Introduction', 'description#3'): ''
+        })
+        self.assertEqual(chunk_counts,
+                         {('Introduction', 'description'): 1})
+
+    def test_join_records_reverses_split_items(self):
+        """
+        Joining the records written for items gives back the whole
+        values, and the chunk counts of items stored as several records
+        """
+        items = {
+            ('Introduction', 'description'): 'abcdefghij',
+            ('Introduction', 'demo_link'): 'abc'
+        }
+        records = records_list(chunking.split_items(items, {}))
+
+        joined, chunk_counts = chunking.join_records(records)
+
+        self.assertEqual(
+            {
+                (record['Section Type'], record['Data Type']):
+                    record['Value']
+                for record in joined
+            },
+            items
+        )
+        self.assertEqual(chunk_counts,
+                         {('Introduction', 'description'): 3})
+
+    def test_join_records_ignores_emptied_continuations(self):
+        """
+        Empty continuation records left by a shrunk value are not joined
+        onto the value
+        """
+        chunk_counts = {('Introduction', 'description'): 3}
+        records = records_list(chunking.split_items(
+            {('Introduction', 'description'): 'abcde'},
+            chunk_counts
+        ))
+
+        joined, chunk_counts = chunking.join_records(records)
+
+        self.assertEqual(joined, [{
+            'Section Type': 'Introduction',
+            'Data Type': 'description',
+            'Value': 'abcde'
+        }])
+        self.assertEqual(chunk_counts,
+                         {('Introduction', 'description'): 2})
+
+    def test_split_records_round_trip(self):
+        """
+        Records rewritten in one go with split_records are joined back
+        into the same records, in the same order
+        """
+        records = [
+            {
+                'Section Type': 'Introduction',
+                'Data Type': 'description',
+                'Value': 'abcdefghij'
+            },
+            {
+                'Section Type': 'Features',
+                'Data Type': '1|feature_name',
+                'Value': 'Menu'
+            }
+        ]
+
+        stored = chunking.split_records(records)
+        joined, _ = chunking.join_records(stored)
+
+        self.assertEqual(len(stored), 4)
+        self.assertEqual(joined, records)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Tests that starting the app stays fast.
+
+Every websocket connection starts a new 'python3 run.py', so importing
+run must not import the slow Google and rendering libraries, which are
+only imported once they are first used. The import is run in a fresh
+interpreter, so nothing imported by the test runner is counted.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds importing run may take
+IMPORT_BUDGET = float(
+    os.environ.get('README_GENERATOR_IMPORT_BUDGET', 0.3)
+)
+
+# Modules that must not be imported until they are used
+DEFERRED_MODULES = [
+    'gspread',
+    'google.auth',
+    'google.oauth2',
+    'multiprocessing',
+    'requests',
+    'tabulate',
+    'yaml'
+]
+
+IMPORT_SCRIPT = """
+import json
+import sys
+import time
+
+started = time.perf_counter()
+import run
+elapsed = time.perf_counter() - started
+
+print(json.dumps({
+    'elapsed': elapsed,
+    'modules': [name for name in sys.argv[1:] if name in sys.modules]
+}))
+"""
+
+
+def import_run():
+    """
+    Imports run in a fresh interpreter, returning the time it took and
+    which of the deferred modules it imported
+    """
+
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORT_SCRIPT] + DEFERRED_MODULES,
+        cwd=ROOT,
+        capture_output=True,
+        check=True,
+        text=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class ImportTimeTest(unittest.TestCase):
+    """
+    Tests the cold start cost of importing run
+    """
+
+    def test_slow_libraries_are_not_imported(self):
+        """
+        Importing run imports none of the deferred modules
+        """
+        self.assertEqual(import_run()['modules'], [])
+
+    def test_import_stays_within_budget(self):
+        """
+        Importing run takes less than IMPORT_BUDGET seconds. The fastest
+        of a few runs is used, so a busy machine does not fail the test
+        """
+        elapsed = min(import_run()['elapsed'] for _ in range(3))
+        self.assertLess(elapsed, IMPORT_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
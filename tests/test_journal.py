@@ -0,0 +1,212 @@
+"""
+Tests the local write journal, and replaying it into a storage.
+
+Each test uses a journal file and SQLite database in a temporary
+directory, so no network is needed.
+"""
+
+import os
+import tempfile
+import unittest
+
+from storage import SQLiteStorage, WriteBehindQueue, WriteJournal
+
+
+class JournalTestCase(unittest.TestCase):
+    """
+    Creates a journal in a temporary directory for each test
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'journal.jsonl')
+        self.journal = WriteJournal(self.path, 'sqlite:test')
+
+    def append_line(self, text):
+        """
+        Appends raw text to the journal file, e.g. a torn line
+        """
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(text)
+
+
+class WriteJournalTest(JournalTestCase):
+    """
+    Tests WriteJournal
+    """
+
+    def test_pending_items_keep_the_latest_value(self):
+        """
+        Several writes to an item are coalesced into the latest one, and
+        every entry covering the readme is returned
+        """
+        self.journal.record('Project', {('Introduction', 'description'): 'a'})
+        self.journal.record('Project', {
+            ('Introduction', 'description'): 'b',
+            ('Introduction', 'demo_link'): 'link'
+        })
+        self.journal.record('Other', {('Introduction', 'description'): 'c'})
+
+        ids, items = self.journal.pending_items('Project')
+
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(items, {
+            ('Introduction', 'description'): 'b',
+            ('Introduction', 'demo_link'): 'link'
+        })
+        self.assertEqual(self.journal.titles(), ['Project', 'Other'])
+
+    def test_other_scopes_are_not_read(self):
+        """
+        Entries journaled for another storage, or with no scope, are
+        never read
+        """
+        WriteJournal(self.path, 'sqlite:other').record(
+            'Project', {('Introduction', 'description'): 'other'}
+        )
+        WriteJournal(self.path).record(
+            'Project', {('Introduction', 'description'): 'none'}
+        )
+
+        self.assertEqual(self.journal.pending_items('Project'), ([], {}))
+        self.assertEqual(self.journal.titles(), [])
+
+    def test_remove_keeps_other_entries(self):
+        """
+        Removing synced entries keeps those of other readmes and scopes
+        """
+        other_journal = WriteJournal(self.path, 'sqlite:other')
+        self.journal.record('Project', {('Introduction', 'description'): 'a'})
+        self.journal.record('Other', {('Introduction', 'description'): 'b'})
+        other_journal.record(
+            'Project', {('Introduction', 'description'): 'c'}
+        )
+
+        ids, _ = self.journal.pending_items('Project')
+        self.journal.remove(ids)
+
+        self.assertEqual(self.journal.titles(), ['Other'])
+        self.assertEqual(other_journal.titles(), ['Project'])
+
+    def test_torn_line_is_skipped(self):
+        """
+        A line torn by a process killed while appending is skipped, and
+        the next entry starts on a line of its own
+        """
+        self.journal.record('Project', {('Introduction', 'description'): 'a'})
+        self.append_line('{"id": "torn", "scope": "sqlite:te')
+        self.journal.record('Project', {('Introduction', 'demo_link'): 'b'})
+
+        _, items = self.journal.pending_items('Project')
+
+        self.assertEqual(items, {
+            ('Introduction', 'description'): 'a',
+            ('Introduction', 'demo_link'): 'b'
+        })
+
+    def test_remove_drops_torn_lines(self):
+        """
+        Compacting the journal drops lines that cannot be decoded
+        """
+        self.journal.record('Project', {('Introduction', 'description'): 'a'})
+        self.append_line('not json\n')
+        self.journal.record('Other', {('Introduction', 'description'): 'b'})
+
+        ids, _ = self.journal.pending_items('Project')
+        self.journal.remove(ids)
+
+        with open(self.path, encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(self.journal.titles(), ['Other'])
+
+    def test_apply_overlays_pending_items(self):
+        """
+        Journaled writes replace the values of stored records, and items
+        not stored yet are appended
+        """
+        self.journal.record('Project', {
+            ('Introduction', 'description'): 'new',
+            ('Introduction', 'demo_link'): 'link'
+        })
+        records = [{
+            'Section Type': 'Introduction',
+            'Data Type': 'description',
+            'Value': 'old'
+        }]
+
+        self.assertEqual(self.journal.apply('Project', records), [
+            {'Section Type': 'Introduction', 'Data Type': 'description',
+             'Value': 'new'},
+            {'Section Type': 'Introduction', 'Data Type': 'demo_link',
+             'Value': 'link'}
+        ])
+
+
+class WriteBehindQueueTest(JournalTestCase):
+    """
+    Tests syncing journaled writes to a SQLite storage
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.storage = SQLiteStorage(
+            os.path.join(self.directory.name, 'readmes.db')
+        )
+        self.storage.create_readme('Project')
+        self.journal = WriteJournal(self.path, self.storage.scope())
+
+    def test_flush_writes_and_empties_the_journal(self):
+        """
+        Submitted writes are coalesced into the store, and removed from
+        the journal once written
+        """
+        writer = WriteBehindQueue(self.storage, self.journal)
+        self.addCleanup(writer.close)
+
+        writer.submit('Project', {('Introduction', 'description'): 'a'})
+        writer.submit('Project', {('Introduction', 'description'): 'b'})
+
+        self.assertTrue(writer.flush())
+        self.assertEqual(
+            self.storage.open_readme('Project').load_records(),
+            [{'Section Type': 'Introduction', 'Data Type': 'description',
+              'Value': 'b'}]
+        )
+        self.assertEqual(self.journal.titles(), [])
+
+    def test_resume_replays_an_earlier_journal(self):
+        """
+        Writes left in the journal, e.g. by a run that was offline, are
+        replayed by a new queue
+        """
+        self.journal.record('Project', {('Introduction', 'description'): 'a'})
+
+        writer = WriteBehindQueue(self.storage, self.journal)
+        self.addCleanup(writer.close)
+        writer.resume()
+
+        self.assertTrue(writer.flush())
+        self.assertEqual(
+            self.storage.open_readme('Project').load_records()[0]['Value'],
+            'a'
+        )
+        self.assertEqual(self.journal.titles(), [])
+
+    def test_failed_writes_stay_journaled(self):
+        """
+        Writes to a readme the storage cannot open stay in the journal
+        """
+        writer = WriteBehindQueue(self.storage, self.journal)
+        self.addCleanup(writer.close)
+
+        writer.submit('Missing', {('Introduction', 'description'): 'a'})
+
+        self.assertFalse(writer.flush())
+        self.assertEqual(self.journal.titles(), ['Missing'])
+        self.assertTrue(writer.status().startswith('Offline'))
+
+
+if __name__ == '__main__':
+    unittest.main()
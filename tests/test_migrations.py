@@ -0,0 +1,141 @@
+"""
+Tests converting readme records from schema 1 to schema 2.
+"""
+
+import unittest
+
+import migrations
+
+
+def record(section_type, data_type, value):
+    """
+    Returns a record as returned by load_records
+    """
+    return {'Section Type': section_type, 'Data Type': data_type,
+            'Value': value}
+
+
+SCHEMA_1_RECORDS = [
+    record('Introduction', 'description', 'A tool'),
+    record('User Experience', 'aims', 'First aim\nSecond aim'),
+    record('User Experience', 'user_stories', 'log in|see my work'),
+    record('Features', '1|feature_name', 'Menu'),
+    record('Features', '1|point', 'Fast\n\nSimple')
+]
+
+
+def entries(records, section_type, data_type):
+    """
+    Returns the values of the schema 2 entries of a list, in order
+    """
+
+    return [
+        row['Value'] for row in records
+        if row['Section Type'] == section_type and
+        migrations.split_item_data_type(row['Data Type'])[0] == data_type and
+        migrations.split_item_data_type(row['Data Type'])[1]
+    ]
+
+
+class MigrateRecordsTest(unittest.TestCase):
+    """
+    Tests migrate_records
+    """
+
+    def test_lists_are_split_into_entries(self):
+        """
+        Site aims, user stories and points of note are split into one
+        record per entry, blank entries are dropped and other records are
+        kept as they are
+        """
+        migrated, _ = migrations.migrate_records(SCHEMA_1_RECORDS)
+
+        self.assertEqual(entries(migrated, 'User Experience', 'aims'),
+                         ['First aim', 'Second aim'])
+        self.assertEqual(
+            entries(migrated, 'User Experience', 'user_stories'),
+            ['log in|see my work']
+        )
+        self.assertEqual(entries(migrated, 'Features', '1|point'),
+                         ['Fast', 'Simple'])
+        self.assertIn(record('Introduction', 'description', 'A tool'),
+                      migrated)
+        self.assertIn(record('Features', '1|feature_name', 'Menu'),
+                      migrated)
+        self.assertEqual(migrations.schema_version(migrated),
+                         migrations.SCHEMA_VERSION)
+
+    def test_changes_empty_the_schema_1_lists(self):
+        """
+        The changes write every new entry and the schema version, and
+        empty each schema 1 list record
+        """
+        migrated, changes = migrations.migrate_records(SCHEMA_1_RECORDS)
+
+        self.assertEqual(changes[('User Experience', 'aims')], '')
+        self.assertEqual(changes[('User Experience', 'user_stories')], '')
+        self.assertEqual(changes[('Features', '1|point')], '')
+        self.assertEqual(
+            changes[(migrations.META_SECTION, migrations.SCHEMA_DATA_TYPE)],
+            str(migrations.SCHEMA_VERSION)
+        )
+        for row in migrated:
+            self.assertEqual(
+                changes.get((row['Section Type'], row['Data Type']),
+                            row['Value']),
+                row['Value']
+            )
+        self.assertNotIn(('Introduction', 'description'), changes)
+
+    def test_entry_ids_are_deterministic(self):
+        """
+        Migrating the same records twice gives the same entry ids, and
+        equal entries in a list still get ids of their own
+        """
+        records = [record('User Experience', 'aims', 'Same\nSame')]
+
+        first, _ = migrations.migrate_records(records)
+        second, _ = migrations.migrate_records(records)
+
+        self.assertEqual(first, second)
+        data_types = [row['Data Type'] for row in first]
+        self.assertEqual(len(set(data_types)), len(data_types))
+
+    def test_current_schema_is_left_alone(self):
+        """
+        Records already in the current schema are returned unchanged,
+        with no changes to write
+        """
+        migrated, _ = migrations.migrate_records(SCHEMA_1_RECORDS)
+
+        again, changes = migrations.migrate_records(migrated)
+
+        self.assertIs(again, migrated)
+        self.assertEqual(changes, {})
+
+
+class CompactRecordsTest(unittest.TestCase):
+    """
+    Tests compact_records
+    """
+
+    def test_empty_records_are_dropped(self):
+        """
+        Deleted entries and emptied schema 1 lists are dropped, everything
+        else is kept in order
+        """
+        records = [
+            record('User Experience', 'aims', ''),
+            record('User Experience', 'aims/1a2b3c4d', 'An aim'),
+            record('User Experience', 'aims/5e6f7a8b', ''),
+            record('Introduction', 'description', 'A tool')
+        ]
+
+        self.assertEqual(migrations.compact_records(records), [
+            record('User Experience', 'aims/1a2b3c4d', 'An aim'),
+            record('Introduction', 'description', 'A tool')
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
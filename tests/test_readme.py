@@ -0,0 +1,150 @@
+"""
+Tests staging readme writes in section-edit transactions.
+
+The readme's session is replaced by a fake one that records what is
+handed to the write-behind queue, so no storage is needed.
+"""
+
+import unittest
+
+import migrations
+from readme import Readme
+
+
+class FakeJournal:
+    """
+    A journal with no journaled writes
+    """
+
+    def apply(self, title, records):
+        """
+        Returns the records unchanged
+        """
+        return records
+
+
+class FakeWriter:
+    """
+    A write-behind queue that records every submitted batch
+    """
+
+    def __init__(self):
+        self.journal = FakeJournal()
+        self.batches = []
+
+    def submit(self, title, items, store=None):
+        """
+        Records a batch of item writes
+        """
+        self.batches.append(items)
+
+
+class FakeSession:
+    """
+    A session with a fake writer, whose snapshots are not saved
+    """
+
+    def __init__(self):
+        self.writer = FakeWriter()
+
+    def save_snapshot(self):
+        """
+        Does nothing
+        """
+
+
+def loaded_readme(records):
+    """
+    Returns a readme of a fake session, loaded from records
+    """
+
+    readme = Readme(FakeSession(), 'Project', None)
+    readme.load_sections(records + [{
+        'Section Type': migrations.META_SECTION,
+        'Data Type': migrations.SCHEMA_DATA_TYPE,
+        'Value': str(migrations.SCHEMA_VERSION)
+    }])
+    readme.session.writer.batches.clear()
+    return readme
+
+
+class StageWriteTest(unittest.TestCase):
+    """
+    Tests Readme.stage_write
+    """
+
+    def test_adding_then_deleting_an_entry_writes_nothing(self):
+        """
+        An entry added and deleted in the same transaction was never
+        stored, so no empty value is written for it
+        """
+        readme = loaded_readme([])
+
+        readme.begin_transaction()
+        readme.stage_write('User Experience', 'aims/1a2b3c4d', 'An aim')
+        readme.stage_write('User Experience', 'aims/1a2b3c4d', '')
+        readme.commit_transaction()
+
+        self.assertEqual(readme.session.writer.batches, [])
+
+    def test_deleting_a_stored_entry_writes_an_empty_value(self):
+        """
+        Deleting an entry the store has seen writes an empty value for it
+        """
+        readme = loaded_readme([{
+            'Section Type': 'User Experience',
+            'Data Type': 'aims/1a2b3c4d',
+            'Value': 'An aim'
+        }])
+
+        readme.stage_write('User Experience', 'aims/1a2b3c4d', '')
+
+        self.assertEqual(readme.session.writer.batches,
+                         [{('User Experience', 'aims/1a2b3c4d'): ''}])
+
+    def test_restoring_the_stored_value_writes_nothing(self):
+        """
+        Changing an item and setting it back to its stored value in the
+        same transaction writes nothing
+        """
+        readme = loaded_readme([{
+            'Section Type': 'Introduction',
+            'Data Type': 'description',
+            'Value': 'A tool'
+        }])
+
+        readme.begin_transaction()
+        readme.stage_write('Introduction', 'description', 'Another tool')
+        readme.stage_write('Introduction', 'description', 'A tool')
+        readme.commit_transaction()
+
+        self.assertEqual(readme.session.writer.batches, [])
+
+
+class LoadSectionsTest(unittest.TestCase):
+    """
+    Tests migrating records as a readme is loaded
+    """
+
+    def test_schema_1_records_are_migrated_in_one_batch(self):
+        """
+        Loading schema 1 records saves the migration as a single batch
+        """
+        readme = Readme(FakeSession(), 'Project', None)
+        readme.load_sections([{
+            'Section Type': 'User Experience',
+            'Data Type': 'aims',
+            'Value': 'First aim\nSecond aim'
+        }])
+
+        batches = readme.session.writer.batches
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batches[0][('User Experience', 'aims')], '')
+        self.assertEqual(
+            sorted(value for value in batches[0].values() if value),
+            ['2', 'First aim', 'Second aim']
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()